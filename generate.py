@@ -249,6 +249,9 @@ def main():
                     alert["annotations"]["summary"]
                 ])
 
+    # sorted by start time, so the history can be streamed
+    all_alerts_rows.sort(key=lambda row: row[3])
+
     # Write all alerts into one CSV
     all_alerts_filename = os.path.join(OUTPUT_DIR, "all_alerts.csv")
     with open(all_alerts_filename, "w", newline='') as csvfile:
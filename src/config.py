@@ -12,9 +12,61 @@ class AppConfig:
 
     initial_alpha: int = 1
     initial_beta: int = 1
+    # alpha occurrences a graph edge prior of 1 adds to a new link.
+    edge_prior_weight: int = 0
 
     delay: int = 5
 
+    # python | numpy, engine computing the links from the alert history.
+    preprocess_engine: str = "python"
+    # processes sharing the history batches, 1 keeps it in this process.
+    preprocess_workers: int = 1
+    # batches sampled per batch signature, caps the normalisation target.
+    normalize_reservoir: int = 1000
+    normalize_seed: int | None = None  # None draws from the global random
+    # directory of the persisted link model, empty to always start cold.
+    snapshot_dir: str = ""
+    # dict | binary, binary memory-maps the links written to link_table.
+    link_store: str = "dict"
+    link_table: str = "links.bin"
+
+    # detector micro-batching: drain the queued payloads and process them as
+    # one time ordered step. Alerts are still stored and routed one by one,
+    # so this mostly saves waits on the queue. 0 takes one payload at a time.
+    micro_batch_size: int = 0  # max alerts merged in one step
+    micro_batch_wait: float = 0.05  # seconds to wait for more payloads
+
+    # max alerts waiting for the detector, 0 keeps the queue unbounded.
+    queue_capacity: int = 0
+    queue_overflow: str = "reject"  # reject | drop_oldest | coalesce
+
+    # objects | csr, csr keeps the dependency map in read-only arrays.
+    graph_backend: str = "objects"
+    # seconds between checks of the dependency map for changes, 0 disables.
+    graph_reload_interval: float = 0
+
+    # dict | sqlite, the alert store backend.
+    store: str = "dict"
+    store_cache_size: int = 100_000  # alerts kept as live objects by sqlite
+    sqlite_path: str = "alerts.db"
+    sqlite_commit_batch: int = 1000  # writes per transaction
+    sqlite_commit_interval: float = 1.0  # seconds before a partial commit
+    # alerts cached in front of the store, 0 disables; ttl 0 never expires.
+    store_read_cache: int = 0
+    store_read_cache_ttl: float = 0
+
+    # alert store journal, written behind once either threshold is hit.
+    journal_batch_size: int = 512  # records
+    journal_flush_interval: float = 1.0  # seconds
+    journal_offload: bool = False  # write from a thread
+    journal_segment_bytes: int = 64 * 1024 * 1024  # rotate segments past it
+    journal_compress: bool = True  # gzip closed segments
+    journal_replay_workers: int = 1  # processes reading segments on startup
+
+    # seconds an alert is remembered after it was last received, re-sends
+    # included, to drop alertmanager re-sends. 0 disables.
+    dedup_ttl: int = 0
+
 
 def load_config(path: str) -> AppConfig:
     with open(path, "r") as f:
@@ -1,10 +1,15 @@
 from abc import ABC
-from src.graph import BaseGraph
+import asyncio
+import logging
+from src.graph import BaseGraph, InvalidOperationError
 from src.models import FeedBack
 from src.message_queue import BaseMessageQueue
 from src.models import Alert
 from src.notifier import BaseNotifier
 from src.storage import BaseAlertStore
+from src.config import cfg
+
+log = logging.getLogger(__package__)
 
 
 class BaseDetector(ABC):
@@ -24,15 +29,81 @@ class BaseDetector(ABC):
     async def start(self):
         """this is the main func that needs to start and then listen for alerts and process it."""
         while True:
+            if cfg.micro_batch_size:
+                await self.process_micro_batch(await self.next_micro_batch())
+                continue
+
             batch = await self.queue.get()
-            for raw in sorted(batch, key=lambda x: x.get("startsAt")):
-                alert = Alert(raw)
-                if alert.severity == "critical":
+            for alert in self.decode(batch):
+                try:
                     await self.store.put(alert.id, alert)
                     await self.process_alert(alert)
+                except InvalidOperationError as e:
+                    log.warning(f"Skipping alert {alert.id}, not in the graph: {e}")
+
+    def decode(self, raws: list[dict]) -> list[Alert]:
+        """
+        The critical alerts of the payloads in start order. Alerts of services
+        the graph does not know, e.g. removed by a reload while they were
+        queued, are skipped.
+        """
+        alerts = []
+        for raw in sorted(raws, key=lambda x: x.get("startsAt")):
+            try:
+                alert = Alert(raw)
+            except KeyError as e:
+                log.warning(f"Skipping an alert of an unknown service: {e}")
+                continue
+            if alert.severity == "critical":
+                alerts.append(alert)
+        return alerts
+
+    async def next_micro_batch(self) -> list[dict]:
+        """
+        Waits for a payload then drains whatever else gets queued, until
+        `micro_batch_size` alerts are collected or `micro_batch_wait` passes.
+        """
+        raws = list(await self.queue.get())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + cfg.micro_batch_wait
+
+        while len(raws) < cfg.micro_batch_size:
+            if not self.queue.empty():
+                raws.extend(self.queue.get_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                raws.extend(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        return raws
+
+    async def process_micro_batch(self, raws: list[dict]):
+        """
+        Processes the merged payloads in start order. The alerts go through
+        `process_alerts` one at a time, there is no bulk store write.
+        """
+        alerts = self.decode(raws)
+        log.debug(f"Processing {len(alerts)} alerts from {len(raws)} in one step.")
+
+        await self.process_alerts(alerts)
 
     async def process_alert(self, alert: Alert):
         pass
 
+    async def process_alerts(self, alerts: list[Alert]):
+        # the store is written right before each alert is processed, as the
+        # counts seen while processing must not include later alerts.
+        for alert in alerts:
+            try:
+                await self.store.put(alert.id, alert)
+                await self.process_alert(alert)
+            except InvalidOperationError as e:
+                log.warning(f"Skipping alert {alert.id}, not in the graph: {e}")
+
     async def feedback_handler(self, fb: FeedBack):
         pass
@@ -0,0 +1,77 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from src.config import cfg
+from src.models import MICROSECOND
+
+
+class BatchIndex:
+    """
+    Indexes the open alert batches by the time window in which they accept
+    alerts and by the services they contain, so an incoming alert is only
+    offered to batches that can actually take it.
+
+    Time is split in buckets of `bucket` width and every batch is registered
+    in the buckets its `[lower_bound - time_delta, upper_bound + time_delta]`
+    window overlaps. Times are epoch microseconds, as `Alert.starts_us`.
+    """
+
+    def __init__(
+        self, bucket: timedelta = cfg.time_delta, slack: timedelta = cfg.time_delta
+    ) -> None:
+        self.width = bucket // MICROSECOND
+        self.slack = slack // MICROSECOND
+
+        self.by_bucket: dict[int, set] = defaultdict(set)
+        self.spans: dict[object, tuple[int, int]] = {}
+        self.services: dict[object, set[int]] = {}
+        self.order: dict[object, int] = {}
+        self.seq = 0
+
+    def _bucket(self, t: int) -> int:
+        return t // self.width
+
+    def add(self, batch):
+        self.order[batch] = self.seq
+        self.seq += 1
+        self.services[batch] = set()
+        self.update(batch)
+
+    def update(self, batch):
+        """Re-reads the window and services of a batch after it took an alert."""
+        self.services[batch].update(
+            s for s, alerts in batch.service_to_alert.items() if alerts
+        )
+
+        first = self._bucket(batch.lower_bound - self.slack)
+        last = self._bucket(batch.upper_bound + self.slack)
+        old_first, old_last = self.spans.get(batch, (first, first - 1))
+        # windows only grow, so only the new buckets need registering.
+        for b in range(first, last + 1):
+            if not old_first <= b <= old_last:
+                self.by_bucket[b].add(batch)
+        self.spans[batch] = (min(first, old_first), max(last, old_last))
+
+    def remove(self, batch):
+        if batch not in self.order:
+            return
+        first, last = self.spans.pop(batch)
+        for b in range(first, last + 1):
+            bucket = self.by_bucket.get(b)
+            if bucket is None:
+                continue
+            bucket.discard(batch)
+            if not bucket:
+                del self.by_bucket[b]
+        del self.services[batch]
+        del self.order[batch]
+
+    def candidates(self, t: int, services: set[int]) -> list:
+        """Batches whose window covers `t` and which hold one of `services`, oldest first."""
+        found = [
+            batch
+            for batch in self.by_bucket.get(self._bucket(t), ())
+            if not services.isdisjoint(self.services[batch])
+        ]
+        found.sort(key=self.order.__getitem__)
+        return found
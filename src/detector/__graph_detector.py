@@ -111,9 +111,7 @@ class GraphDetector(BaseDetector):
         """
         If a root candidate exists for which this alert.service is a parent, cancel it.
         """
-        try:
-            pnode = self.service_graph.get_node(GraphNode.get_id(parent.service))
-        except Exception:
+        if not self.service_graph.has_node(parent.service):
             return
 
         # For every waiting root alert, check if parent.service is upstream
@@ -121,13 +119,9 @@ class GraphDetector(BaseDetector):
             ralert, _ = await self.store.get(rid)
             if not ralert:
                 continue
-            try:
-                rnode = self.service_graph.get_node(GraphNode.get_id(ralert.service))
-            except Exception:
-                continue
 
             # If this new alert is a parent of the root's service, cancel root
-            if any(p.id == pnode.id for p in rnode.parents):
+            if self.service_graph.distance(parent.service, ralert.service) == 1:
                 log.info(f"Cancelling root {rid}; parent {parent.id} arrived.")
                 self._cancel_notify(rid)
                 self.roots.discard(rid)
@@ -1,16 +1,31 @@
 import asyncio
 from collections import defaultdict
-from datetime import datetime
 
 
 from src.models import AlertGroup, FeedBack
 from src.storage import BaseAlertStore
+from src.links import BaseLinkStore, DictLinkStore, LinkSnapshot
 from . import BaseDetector, log
+from .__batch_index import BatchIndex
 from src.message_queue import BaseMessageQueue
-from src.graph import BaseGraph
+from src.graph import BaseGraph, InvalidOperationError
 from src.notifier import BaseNotifier
-from src.models import Alert
+from src.models import MICROSECOND, Alert
 from src.config import cfg
+from src import metrics
+
+
+def initial_alpha(graph: BaseGraph, key: tuple[str, str]) -> int:
+    """
+    Alpha of a new link, the initial alpha plus the prior of the graph edge
+    between the two services worth `edge_prior_weight` occurrences. Folded
+    in once when the link is created, so the strength costs nothing more.
+    """
+    if not cfg.edge_prior_weight:
+        return cfg.initial_alpha
+    parent, child = map(Alert.service_of, key)
+    prior = graph.get_edge_prior(parent, child)
+    return cfg.initial_alpha + round(cfg.edge_prior_weight * prior)
 
 
 class AlertBatch:
@@ -21,7 +36,7 @@ class AlertBatch:
         graph: BaseGraph,
         store: BaseAlertStore,
         notifier: BaseNotifier,
-        links: dict,
+        links: BaseLinkStore,
         trigger_delete=lambda x: None,
     ):
         self.service_graph = graph
@@ -31,8 +46,9 @@ class AlertBatch:
 
         self.links = links
 
-        self.lower_bound: datetime = None
-        self.upper_bound: datetime = None
+        # start times of the earliest and latest alerts, epoch microseconds.
+        self.lower_bound: int | None = None
+        self.upper_bound: int | None = None
 
         self.curr_alerts = set()  # set[Alert]
         self.service_to_alert: dict[int, set[Alert]] = defaultdict(set)
@@ -40,96 +56,76 @@ class AlertBatch:
         self.groups: list[AlertGroup] = []
 
     def check_temporal(self, alert: Alert):
-        if self.lower_bound:
+        if self.lower_bound is not None:
+            slack = cfg.time_delta // MICROSECOND
             if not (
-                self.lower_bound - cfg.time_delta
-                <= alert.startsAt
-                <= self.upper_bound + cfg.time_delta
+                self.lower_bound - slack <= alert.starts_us <= self.upper_bound + slack
             ):
                 return False
         return True
 
-    async def check_and_add_alert(self, alert: Alert):
+    def candidate_links(self, alert: Alert) -> list[tuple[str, str]]:
+        """
+        Links the alert would get if it joined this batch. Read only, neither
+        the batch nor the link table is touched. Empty when the batch can't
+        take the alert.
+        """
         temporality = self.check_temporal(alert)
         log.debug(
             f"temporal check for alert {alert.id} {'passed' if temporality else 'falied'}"
         )
         if not temporality:
-            return False
+            return []
 
-        linked = False
-
-        if alert.service in self.service_to_alert and len(
-            self.service_to_alert[alert.service]
-        ):
-            log.debug("Found same service is having an alert.")
-            for o_alert in self.service_to_alert[alert.service]:
-                linked = True
-                if (o_alert.id, alert.id) not in self.links:
-                    self.links[(o_alert.id, alert.id)] = [
-                        cfg.initial_alpha,
-                        cfg.initial_beta,
-                    ]
-                if (alert.id, o_alert.id) not in self.links:
-                    self.links[(alert.id, o_alert.id)] = [
-                        cfg.initial_alpha,
-                        cfg.initial_beta,
-                    ]
-
-        parents = self.service_graph.get_parents(alert.service)
-        children = self.service_graph.get_dependents(alert.service)
-
-        for p in parents:
-            for p_alert in self.service_to_alert[p.id]:
-                linked = True
-                if (p_alert.id, alert.id) not in self.links:
-                    self.links[(p_alert.id, alert.id)] = [
-                        cfg.initial_alpha,
-                        cfg.initial_beta,
-                    ]
-        if linked:
-            log.debug("Found a parent for this alert.")
-
-        for c in children:
-            for c_alert in self.service_to_alert[c.id]:
-                linked = True
-                if (alert.id, c_alert.id) not in self.links:
-                    self.links[(alert.id, c_alert.id)] = [
-                        cfg.initial_alpha,
-                        cfg.initial_beta,
-                    ]
-
-        if not linked:
-            log.debug("No links found")
-            return False
+        keys = []
+        for o_alert in self.service_to_alert.get(alert.service, ()):
+            keys.append((o_alert.id, alert.id))
+            keys.append((alert.id, o_alert.id))
+
+        for p in self.service_graph.get_parent_ids(alert.service):
+            for p_alert in self.service_to_alert.get(p, ()):
+                keys.append((p_alert.id, alert.id))
+
+        for c in self.service_graph.get_dependent_ids(alert.service):
+            for c_alert in self.service_to_alert.get(c, ()):
+                keys.append((alert.id, c_alert.id))
 
-        log.debug("links found")
+        log.debug("links found" if keys else "No links found")
+        return keys
+
+    async def add_alert(self, alert: Alert, keys: list[tuple[str, str]]):
+        """Adds the alert to the batch, creating the links from `candidate_links`."""
+        for key in keys:
+            if key not in self.links:
+                self.links[key] = [
+                    initial_alpha(self.service_graph, key),
+                    cfg.initial_beta,
+                ]
 
         self.curr_alerts.add(alert.id)
         self.service_to_alert[alert.service].add(alert)
 
-        if not self.lower_bound:
-            self.lower_bound = self.upper_bound = alert.startsAt
+        if self.lower_bound is None:
+            self.lower_bound = self.upper_bound = alert.starts_us
         else:
-            self.lower_bound = min(self.lower_bound, alert.startsAt)
-            self.upper_bound = max(self.upper_bound, alert.startsAt)
+            self.lower_bound = min(self.lower_bound, alert.starts_us)
+            self.upper_bound = max(self.upper_bound, alert.starts_us)
 
         await self.handle_this_alert(alert)
-        return True
 
-    async def handle_this_alert(self, alert: Alert):
-        children = []
-        parents = []
-        for link, vals in self.links.items():
-            if alert.id not in link:
-                continue
+    async def check_and_add_alert(self, alert: Alert):
+        keys = self.candidate_links(alert)
+        if not keys:
+            return False
 
-            a, b = link
-            if a == alert.id and b in self.curr_alerts:
-                children.append(b)
+        await self.add_alert(alert, keys)
+        return True
 
-            if b == alert.id and a in self.curr_alerts:
-                parents.append(a)
+    async def handle_this_alert(self, alert: Alert):
+        children = [
+            c for c in self.links.children_of(alert.id) if c in self.curr_alerts
+        ]
+        parents = [p for p in self.links.parents_of(alert.id) if p in self.curr_alerts]
 
         # if this has no parent then this may be a root
         # even if its not then the current alert can be a link to 2 seperate groups
@@ -239,16 +235,14 @@ class AlertBatch:
             return
 
     async def check_for_other_parents(self, curr_id, child_id):
-        _, curr_strength = await self.get_strength(curr_id, child_id)
-        for a, b in self.links.keys():
-            if b != child_id:
-                continue
-
-            _, other_strenght = await self.get_strength(a, b)
-            if curr_strength <= other_strenght:
-                return True
-
-        return False
+        # every parent shares the child's count as denominator of the strength,
+        # so comparing alphas is the same as comparing strengths. The current
+        # link is one of the candidates, as it always has been.
+        curr_alpha, _ = self.links.get(
+            (curr_id, child_id), (cfg.initial_alpha, cfg.initial_beta)
+        )
+        best_alpha = self.links.best_parent_alpha(child_id)
+        return best_alpha is not None and curr_alpha <= best_alpha
 
     def register_as_a_root(self, alert: Alert):
         log.debug(f"registering {alert.id} as root")
@@ -300,20 +294,31 @@ class ProbabilityDetector(BaseDetector):
         store: BaseAlertStore,
         notifier: BaseNotifier,
         precomputed_links=None,
+        snapshot: LinkSnapshot | None = None,
     ):
         super().__init__(graph, work_queue, store, notifier)
+        self.snapshot = snapshot
 
-        self.links = precomputed_links or defaultdict(
-            lambda: [cfg.initial_alpha, cfg.initial_beta]
-        )
+        if isinstance(precomputed_links, BaseLinkStore):
+            self.links = precomputed_links
+        else:
+            self.links = DictLinkStore(precomputed_links)
         self.batches: list[AlertBatch] = []
+        self.batch_index = BatchIndex()
+        self.link_table_size = metrics.gauge("detector.link_table_size")
 
-    async def process_alert(self, alert: Alert):
+    async def process_alert(self, alert: Alert, services: set[int] | None = None):
         log.debug(f"Processing alert {alert.id} {alert.service_name} {alert.summary}")
-        for batch in self.batches:
-            if await batch.check_and_add_alert(alert):
+        if services is None:
+            services = self.related_services(alert.service)
+        for batch in self.batch_index.candidates(alert.starts_us, services):
+            keys = batch.candidate_links(alert)
+            if keys:
+                await batch.add_alert(alert, keys)
                 log.debug("added alert to an already present batch.")
+                self.batch_index.update(batch)
                 alert.batch = batch
+                self.link_table_size.set(len(self.links))
                 return
 
         log.debug(
@@ -329,26 +334,55 @@ class ProbabilityDetector(BaseDetector):
         )
         new_batch.curr_alerts.add(alert.id)
         new_batch.service_to_alert[alert.service].add(alert)
+        new_batch.lower_bound = new_batch.upper_bound = alert.starts_us
         alert.batch = new_batch
         alert.group = AlertGroup(alert)
         new_batch.register_as_a_root(alert)
         self.batches.append(new_batch)
+        self.batch_index.add(new_batch)
+        self.link_table_size.set(len(self.links))
+
+    async def process_alerts(self, alerts: list[Alert]):
+        # alerts of one step often come from a few services, look them up once.
+        related: dict[int, set[int]] = {}
+        for alert in alerts:
+            try:
+                if alert.service not in related:
+                    related[alert.service] = self.related_services(alert.service)
+                await self.store.put(alert.id, alert)
+                await self.process_alert(alert, related[alert.service])
+            except InvalidOperationError as e:
+                log.warning(f"Skipping alert {alert.id}, not in the graph: {e}")
+
+    def related_services(self, service: int) -> set[int]:
+        """Services whose alerts can be linked with an alert of `service`."""
+        return {
+            service,
+            *self.service_graph.get_parent_ids(service),
+            *self.service_graph.get_dependent_ids(service),
+        }
 
     async def feedback_handler(self, fb: FeedBack):
         for (cause, effect), confirmed in fb.relations.items():
             key = (cause, effect)
-            alpha, beta_ = self.links[key]
+            link = self.links.get(key)
+            if link is None:
+                link = [initial_alpha(self.service_graph, key), cfg.initial_beta]
+            alpha, beta_ = link
             if confirmed:
                 alpha += 1  # one more success
             else:
                 beta_ += 10  # aggressively reduce the strength.
             self.links[key] = [alpha, beta_]
+            if self.snapshot:
+                self.snapshot.append(key, [alpha, beta_])
             log.debug(f"Updating link with {key=} by {alpha=}, {beta_}")
+        self.link_table_size.set(len(self.links))
 
         log.info("Causal link counts updated from feedback.")
 
     def trigger_delete(self, ag: AlertBatch):
         log.debug(f"deleting AlertGroup with root as {ag}")
-        ind = self.batches.index(ag)
-        if ind != -1:
-            self.batches.pop(ind)
+        self.batch_index.remove(ag)
+        if ag in self.batches:
+            self.batches.remove(ag)
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
+
 from src.models import GraphNode
 
 
@@ -6,9 +8,35 @@ class InvalidOperationError(Exception):
     pass
 
 
+def edge_priors(edges: dict[int, dict]) -> dict[int, float]:
+    """
+    Prior strength in [0, 1] of the edges from each parent of a node: the
+    share of the node's calls going to the parent, scaled by the latency
+    coupling and criticality of the edge (each 1 when not given).
+    """
+    total = sum(attrs.get("calls", 0) for attrs in edges.values())
+    priors = {}
+    for parent_id, attrs in edges.items():
+        if not attrs:
+            continue
+        share = attrs.get("calls", 0) / total if total else 1.0
+        prior = (
+            share * attrs.get("latency_coupling", 1.0) * attrs.get("criticality", 1.0)
+        )
+        priors[parent_id] = min(1.0, max(0.0, prior))
+    return priors
+
+
 class BaseGraph(ABC):
     @abstractmethod
-    def add(self, node_id: int, parents: set[int], children: set[int]) -> GraphNode:
+    def add(
+        self,
+        node_id: int,
+        service: str,
+        parents: set[int],
+        children: set[int],
+        edges: dict[int, dict] | None = None,
+    ) -> GraphNode:
         """Add a node to the graph"""
         pass
 
@@ -32,6 +60,33 @@ class BaseGraph(ABC):
         """This func must yield the parents. according to their depth."""
         pass
 
+    @abstractmethod
+    def get_ancestors(self, id: int) -> list[GraphNode]:
+        """All the transitive parents, nearest first."""
+        pass
+
+    @abstractmethod
+    def is_ancestor(self, a: int, b: int) -> bool:
+        """Whether `b` depends on `a`, directly or not."""
+        pass
+
+    @abstractmethod
+    def distance(self, a: int, b: int) -> int | None:
+        """Hops from `a` down to `b`, None if `b` does not depend on `a`."""
+        pass
+
+    def get_parent_ids(self, id: int) -> Iterable[int]:
+        """Ids of the direct parents, without going through the nodes."""
+        return [p.id for p in self.get_parents(id)]
+
+    def get_dependent_ids(self, id: int) -> Iterable[int]:
+        """Ids of the direct dependents, without going through the nodes."""
+        return [c.id for c in self.get_dependents(id)]
+
+    def get_edge_prior(self, parent_id: int, child_id: int) -> float:
+        """Prior strength of the edge between two services, 0 when unknown."""
+        return 0.0
+
     @abstractmethod
     def get_node(self, id: int) -> GraphNode:
         """Fetch a node by its ID to inspect dependencies."""
@@ -1,2 +1,3 @@
-from .__base import BaseGraph, InvalidOperationError
+from .__base import BaseGraph, InvalidOperationError, edge_priors
 from .graph import ServiceGraph
+from .csr_graph import CSRServiceGraph
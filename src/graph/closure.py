@@ -0,0 +1,82 @@
+from collections.abc import Callable, Iterable
+
+
+class Closure:
+    """
+    Transitive closure of a dependency graph over node ids.
+
+    Every node gets a bit, its ancestors (transitive parents) and descendants
+    (transitive children) are kept as bitsets for O(1) reachability checks,
+    along with its ancestors ordered by depth and their distance in hops.
+    Nodes can be added one at a time as they are queried, the descendants
+    then only cover the nodes added so far.
+    """
+
+    def __init__(self) -> None:
+        self.bit: dict[int, int] = {}
+        self.ancestors: dict[int, int] = {}
+        self.descendants: dict[int, int] = {}
+        self.ordered: dict[int, list[int]] = {}  # nearest ancestors first
+        self.hops: dict[int, dict[int, int]] = {}  # node -> ancestor -> hops
+
+    def refresh(self, ids: Iterable[int], parents_of: Callable[[int], Iterable[int]]):
+        """Recomputes the ancestors of `ids`, e.g. the nodes below an edge change."""
+        ids = set(ids)
+        for id in ids:
+            self.bit.setdefault(id, len(self.bit))
+
+        for id in ids:
+            for ancestor in self.hops.get(id, ()):
+                if ancestor in self.descendants:
+                    self.descendants[ancestor] &= ~(1 << self.bit[id])
+
+            hops = {}
+            frontier, depth = [id], 0
+            while frontier:
+                depth += 1
+                next_frontier = []
+                for node in frontier:
+                    for parent in parents_of(node):
+                        if parent not in hops and parent != id:
+                            hops[parent] = depth
+                            next_frontier.append(parent)
+                frontier = next_frontier
+
+            mask = 0
+            for ancestor in hops:
+                self.bit.setdefault(ancestor, len(self.bit))
+                mask |= 1 << self.bit[ancestor]
+                self.descendants[ancestor] = self.descendants.get(ancestor, 0) | (
+                    1 << self.bit[id]
+                )
+            self.ancestors[id] = mask
+            self.ordered[id] = list(hops)
+            self.hops[id] = hops
+
+    def forget(self, id: int):
+        """Drops a node that left the graph, its descendants need a refresh."""
+        for ancestor in self.hops.pop(id, ()):
+            if ancestor in self.descendants:
+                self.descendants[ancestor] &= ~(1 << self.bit[id])
+        self.ancestors.pop(id, None)
+        self.descendants.pop(id, None)
+        self.ordered.pop(id, None)
+
+    def drop(self, ids: Iterable[int]):
+        """Forgets `ids` and the known nodes below them, e.g. after an edge change."""
+        ids = list(ids)
+        for id in {*ids, *(d for id in ids for d in self.below(id))}:
+            self.forget(id)
+
+    def below(self, id: int) -> list[int]:
+        """Ids of the descendants of `id`."""
+        mask = self.descendants.get(id, 0)
+        return [node for node, bit in self.bit.items() if mask >> bit & 1]
+
+    def is_ancestor(self, a: int, b: int) -> bool:
+        bit = self.bit.get(a)
+        return bit is not None and bool(self.ancestors.get(b, 0) >> bit & 1)
+
+    def distance(self, a: int, b: int) -> int | None:
+        """Hops from `a` down to its descendant `b`, None if `b` is not below it."""
+        return self.hops.get(b, {}).get(a)
@@ -0,0 +1,187 @@
+import logging
+import os
+from array import array
+from collections import defaultdict
+
+import yaml
+
+from . import BaseGraph, InvalidOperationError, edge_priors
+from .closure import Closure
+from src.models import GraphNode
+
+log = logging.getLogger(__name__)
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class CSRNode:
+    """View of one node of a `CSRServiceGraph`, neighbours built on access."""
+
+    __slots__ = ("graph", "id")
+
+    def __init__(self, graph: "CSRServiceGraph", id: int) -> None:
+        self.graph = graph
+        self.id = id
+
+    @property
+    def service(self) -> str:
+        return self.graph.services[self.graph.row[self.id]]
+
+    @property
+    def parents(self) -> list["CSRNode"]:
+        return self.graph.get_parents(self.id)
+
+    @property
+    def children(self) -> list["CSRNode"]:
+        return self.graph.get_dependents(self.id)
+
+    def __repr__(self):
+        return str(self.id)
+
+
+class CSRServiceGraph(BaseGraph):
+    """
+    Read-only service graph with the edges in CSR arrays: the parents of the
+    node in row `r` are `parent_ids[parent_off[r]:parent_off[r + 1]]`, the
+    same for the children. Meant for maps with many thousands of services,
+    neighbour ids are read as slices of the arrays without building nodes.
+
+    The graph changes only by reloading the map (`update`), ancestors are
+    computed the first time a node is queried.
+    """
+
+    def __init__(self, config_file="service_dependancy_map.yaml") -> None:
+        self.config_file = config_file
+        self.mtime = os.stat(config_file).st_mtime_ns
+        self.row: dict[int, int] = {}
+        self.services: list[str] = []
+        self.load(self.read())
+
+    def read(self):
+        with open(self.config_file, "r") as f:
+            return yaml.load(f, Loader=Loader)
+
+    def load(self, config: dict):
+        services = {n["id"]: n["service"] for n in config["nodes"]}
+        parents, children = defaultdict(set), defaultdict(set)
+        for node in config["nodes"]:
+            for parent_id in node.get("parents", ()):
+                parents[node["id"]].add(parent_id)
+                children[parent_id].add(node["id"])
+            for child_id in node.get("children", ()):
+                children[node["id"]].add(child_id)
+                parents[child_id].add(node["id"])
+
+        ids = sorted(services.keys() | parents.keys() | children.keys())
+        old = dict(zip(self.services, self.row))
+        priors = {}
+        for node in config["nodes"]:
+            edges = {int(p): attrs for p, attrs in (node.get("edges") or {}).items()}
+            for parent_id, prior in edge_priors(edges).items():
+                priors[parent_id, node["id"]] = prior
+
+        def csr(adjacency):
+            offsets, neighbours = array("I", [0]), array("q")
+            for id in ids:
+                neighbours.extend(sorted(adjacency.get(id, ())))
+                offsets.append(len(neighbours))
+            return offsets, memoryview(neighbours)
+
+        # swapped in one go, a running detector sees the old or the new map.
+        (
+            self.row,
+            self.services,
+            (self.parent_off, self.parent_ids),
+            (self.child_off, self.child_ids),
+            self.closure,
+            self.priors,
+        ) = (
+            {id: row for row, id in enumerate(ids)},
+            [services.get(id, str(id)) for id in ids],
+            csr(parents),
+            csr(children),
+            Closure(),
+            priors,
+        )
+        # services removed or renamed stop resolving to their old id.
+        new = dict(zip(self.services, ids))
+        for service, id in old.items():
+            if GraphNode.srevice_to_id.get(service) == id and new.get(service) != id:
+                del GraphNode.srevice_to_id[service]
+        GraphNode.srevice_to_id.update(new)
+
+    def row_of(self, id: int) -> int:
+        row = self.row.get(id)
+        if row is None:
+            raise InvalidOperationError(f"{id} not in graph.")
+        return row
+
+    def get_parent_ids(self, id: int) -> memoryview:
+        row = self.row_of(id)
+        return self.parent_ids[self.parent_off[row] : self.parent_off[row + 1]]
+
+    def get_dependent_ids(self, id: int) -> memoryview:
+        row = self.row_of(id)
+        return self.child_ids[self.child_off[row] : self.child_off[row + 1]]
+
+    def get_parents(self, id: int) -> list[CSRNode]:
+        return [CSRNode(self, p) for p in self.get_parent_ids(id)]
+
+    def get_dependents(self, id) -> list[CSRNode]:
+        return [CSRNode(self, c) for c in self.get_dependent_ids(id)]
+
+    def get_edge_prior(self, parent_id: int, child_id: int) -> float:
+        return self.priors.get((parent_id, child_id), 0.0)
+
+    def get_node(self, id: int) -> CSRNode:
+        if not self.has_node(id):
+            raise ValueError
+        return CSRNode(self, id)
+
+    def has_node(self, id: int) -> bool:
+        return id in self.row
+
+    def get_roots(self) -> list[CSRNode]:
+        return [CSRNode(self, id) for id in self.row if not self.get_parent_ids(id)]
+
+    def ancestry(self, id: int) -> Closure:
+        if id not in self.closure.hops:
+            self.closure.refresh([id], self.get_parent_ids)
+        return self.closure
+
+    def get_ancestors(self, id: int) -> list[CSRNode]:
+        self.row_of(id)
+        return [CSRNode(self, a) for a in self.ancestry(id).ordered[id]]
+
+    def is_ancestor(self, a: int, b: int) -> bool:
+        return b in self.row and self.ancestry(b).is_ancestor(a, b)
+
+    def distance(self, a: int, b: int) -> int | None:
+        return self.ancestry(b).distance(a, b) if b in self.row else None
+
+    def add(
+        self,
+        node_id: int,
+        service: str,
+        parents: set[int],
+        children: set[int],
+        edges: dict[int, dict] | None = None,
+    ):
+        raise InvalidOperationError("CSR graph is read-only, change the map file.")
+
+    def remove(self, id):
+        raise InvalidOperationError("CSR graph is read-only, change the map file.")
+
+    async def update(self):
+        """Reloads the map when the file changed, keeping it if it is broken."""
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime  # a broken file is reported once.
+            self.load(self.read())
+        except (OSError, yaml.YAMLError, KeyError, TypeError) as e:
+            log.warning(f"Keeping the current graph, cannot reload it: {e}")
+            return False
+        log.info(f"Reloaded {self.config_file}: {len(self.row)} services.")
+        return True
@@ -1,13 +1,22 @@
-from . import BaseGraph, InvalidOperationError
+import logging
+import os
+
+from . import BaseGraph, InvalidOperationError, edge_priors
+from .closure import Closure
 from src.models import GraphNode
 import yaml
 
+log = logging.getLogger(__name__)
+
 
 class ServiceGraph(BaseGraph):
     def __init__(self, config_file="service_dependancy_map.yaml") -> None:
         self.graph = {}  # map that maintains all the nodes.
         # internally the nodes are connected.
         self.loaded_from_config = False
+        # ancestors / descendants of the nodes queried so far, the nodes below
+        # an edge change are dropped and computed again when next queried.
+        self.closure = Closure()
 
         if config_file:
             self.loaded_from_config = True
@@ -15,37 +24,71 @@ class ServiceGraph(BaseGraph):
             self.from_config()
 
     def add(
-        self, node_id: int, service: str, parents: set[int], children: set[int]
+        self,
+        node_id: int,
+        service: str,
+        parents: set[int],
+        children: set[int],
+        edges: dict[int, dict] | None = None,
+    ) -> GraphNode:
+        this = self.link(node_id, service, parents, children, edges)
+        self.closure.drop([node_id, *(child.id for child in this.children)])
+        return this
+
+    def link(
+        self,
+        node_id: int,
+        service: str,
+        parents: set[int],
+        children: set[int],
+        edges: dict[int, dict] | None = None,
     ) -> GraphNode:
-        if node_id in self.graph:
-            this = self.graph[node_id]
-        else:
-            this = GraphNode(node_id, service)
-        self.graph[node_id] = this
+        this = self.node(node_id, service)
+        if this.service != service:
+            self.rename(this, service)
+        if edges is not None:
+            self.set_edges(this, edges)
 
         for child_id in children:
-            if child_id in self.graph:
-                child = self.graph[child_id]
-            else:
-                child = GraphNode(child_id, service)
+            child = self.node(child_id)
             child.parents.add(this)
             this.children.add(child)
 
         for parent_id in parents:
-            if parent_id in self.graph:
-                parent = self.graph[parent_id]
-            else:
-                parent = GraphNode(parent_id, service)
+            parent = self.node(parent_id)
             parent.children.add(this)
             this.parents.add(parent)
 
         return this
 
+    def set_edges(self, node: GraphNode, edges: dict[int, dict]):
+        """Attributes of the edges from the node's parents, keyed by parent id."""
+        node.edges = {int(parent_id): attrs or {} for parent_id, attrs in edges.items()}
+        node.priors = edge_priors(node.edges)
+
+    def get_edge_prior(self, parent_id: int, child_id: int) -> float:
+        child = self.graph.get(child_id)
+        return child.priors.get(parent_id, 0.0) if child else 0.0
+
+    def node(self, id: int, service: str | None = None) -> GraphNode:
+        """The node with `id`, created if missing, its service named later."""
+        if id not in self.graph:
+            self.graph[id] = GraphNode(id, service or str(id))
+        return self.graph[id]
+
+    def rename(self, node: GraphNode, service: str):
+        if GraphNode.srevice_to_id.get(node.service) == node.id:
+            del GraphNode.srevice_to_id[node.service]
+        node.service = service
+        GraphNode.srevice_to_id[service] = node.id
+
     def remove(self, id):
         if id not in self.graph:
             raise InvalidOperationError(f"{id} not in graph.")
 
-        this = self.graph[id]
+        this = self.graph.pop(id)
+        if GraphNode.srevice_to_id.get(this.service) == id:
+            del GraphNode.srevice_to_id[this.service]
 
         for child in this.children:
             child.parents.remove(this)
@@ -53,6 +96,11 @@ class ServiceGraph(BaseGraph):
         for parent in this.parents:
             parent.children.remove(this)
 
+        self.closure.drop([id])
+
+    def parent_ids(self, id: int) -> list[int]:
+        return [p.id for p in self.graph[id].parents] if id in self.graph else []
+
     def get_parents(self, id: int):
         # if id not in self.graph:
         #     raise InvalidOperationError(f"{id} not in graph.")
@@ -83,6 +131,7 @@ class ServiceGraph(BaseGraph):
         if not self.loaded_from_config:
             raise InvalidOperationError("Must not load from the config file")
 
+        self.mtime = os.stat(self.config_file).st_mtime_ns
         with open(self.config_file, "r") as f:
             config = yaml.safe_load(f)
 
@@ -94,8 +143,27 @@ class ServiceGraph(BaseGraph):
             service = node["service"]
             parents = node.get("parents", list())
             children = node.get("children", list())
+            edges = node.get("edges", dict())
+
+            self.link(id, service, parents, children, edges)
 
-            self.add(id, service, parents, children)
+        self.closure = Closure()
+
+    def ancestry(self, id: int) -> Closure:
+        if id not in self.closure.hops:
+            self.closure.refresh([id], self.parent_ids)
+        return self.closure
+
+    def get_ancestors(self, id: int) -> list[GraphNode]:
+        if id not in self.graph:
+            raise InvalidOperationError(f"{id} not in graph.")
+        return [self.graph[a] for a in self.ancestry(id).ordered[id]]
+
+    def is_ancestor(self, a: int, b: int) -> bool:
+        return b in self.graph and self.ancestry(b).is_ancestor(a, b)
+
+    def distance(self, a: int, b: int) -> int | None:
+        return self.ancestry(b).distance(a, b) if b in self.graph else None
 
     def get_node(self, id: int) -> GraphNode:
         if not self.has_node(id):
@@ -106,5 +174,59 @@ class ServiceGraph(BaseGraph):
         return id in self.graph
 
     async def update(self):
-        """Decide the logic for updation request or config or what erver."""
-        pass
+        """
+        Reloads the config file if it changed since it was read, applying
+        the difference in nodes and edges to the live graph. The changes are
+        applied without yielding, so the detector never sees them half done,
+        and a file that fails to parse leaves the graph as it was.
+        """
+        if not self.loaded_from_config:
+            return False
+        try:
+            mtime = os.stat(self.config_file).st_mtime_ns
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime  # a broken file is reported once.
+            with open(self.config_file, "r") as f:
+                config = yaml.safe_load(f)
+            nodes = {n["id"]: n["service"] for n in config["nodes"]}
+            attrs = {n["id"]: n.get("edges") or {} for n in config["nodes"]}
+            edges = set()
+            for node in config["nodes"]:
+                edges.update((p, node["id"]) for p in node.get("parents", ()))
+                edges.update((node["id"], c) for c in node.get("children", ()))
+        except (OSError, yaml.YAMLError, KeyError, TypeError) as e:
+            log.warning(f"Keeping the current graph, cannot reload it: {e}")
+            return False
+
+        curr_edges = {(p.id, n.id) for n in self.graph.values() for p in n.parents}
+        removed_edges = curr_edges - edges
+        added_edges = edges - curr_edges
+
+        for id in self.graph.keys() - nodes.keys():
+            self.remove(id)
+        for id, service in nodes.items():
+            this = self.node(id, service)
+            if this.service != service:
+                self.rename(this, service)
+            self.set_edges(this, attrs[id])
+
+        affected = set()
+        for parent_id, child_id in removed_edges:
+            if parent_id in self.graph and child_id in self.graph:
+                parent, child = self.graph[parent_id], self.graph[child_id]
+                parent.children.discard(child)
+                child.parents.discard(parent)
+                affected.add(child_id)
+        for parent_id, child_id in added_edges:
+            parent, child = self.node(parent_id), self.node(child_id)
+            parent.children.add(child)
+            child.parents.add(parent)
+            affected.add(child_id)
+        self.closure.drop(affected)
+
+        log.info(
+            f"Reloaded {self.config_file}: {len(added_edges)} edges added, "
+            f"{len(removed_edges)} removed."
+        )
+        return True
@@ -0,0 +1,215 @@
+"""
+Builds the service dependency map from span dumps.
+
+    python -m src.graph.trace_import spans.jsonl traces.json -o map.yaml
+
+`.jsonl` files are read as OpenTelemetry OTLP/JSON exports, one export
+request per line, `.json` files as Jaeger query API dumps (`{"data": [...]}`,
+streamed a trace at a time with `ijson`). Every span whose
+parent span is of another service is a call from the parent's service to
+the span's; the callee becomes a parent of the caller in the map, as a
+service is a dependency of the ones calling it.
+"""
+
+import argparse
+import json
+import logging
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import yaml
+
+log = logging.getLogger(__name__)
+
+Edge = tuple[str, str]  # (caller service, callee service)
+
+
+class SpanIndex:
+    """
+    Resolves parent spans across a stream, remembering the service of the
+    last `capacity` spans and of children still waiting for their parent.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.services: OrderedDict[tuple, str] = OrderedDict()
+        self.waiting: OrderedDict[tuple, list[str]] = OrderedDict()
+        self.dropped = 0
+
+    def add(self, trace: str, span: str, parent: str, service: str) -> Iterator[Edge]:
+        key = (trace, span)
+        self.services[key] = service
+        if len(self.services) > self.capacity:
+            self.services.popitem(last=False)
+
+        for child_service in self.waiting.pop(key, ()):
+            yield service, child_service
+
+        if parent:
+            parent_key = (trace, parent)
+            parent_service = self.services.get(parent_key)
+            if parent_service is not None:
+                yield parent_service, service
+            else:
+                self.waiting.setdefault(parent_key, []).append(service)
+                if len(self.waiting) > self.capacity:
+                    self.dropped += len(self.waiting.popitem(last=False)[1])
+
+
+def otel_edges(path: Path, index: SpanIndex) -> Iterator[Edge]:
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for resource_spans in json.loads(line).get("resourceSpans", ()):
+                attributes = resource_spans.get("resource", {}).get("attributes", ())
+                service = next(
+                    (
+                        a["value"].get("stringValue")
+                        for a in attributes
+                        if a["key"] == "service.name"
+                    ),
+                    None,
+                )
+                if service is None:
+                    continue
+                for scope_spans in resource_spans.get("scopeSpans", ()):
+                    for span in scope_spans.get("spans", ()):
+                        yield from index.add(
+                            span["traceId"],
+                            span["spanId"],
+                            span.get("parentSpanId", ""),
+                            service,
+                        )
+
+
+def jaeger_traces(path: Path) -> Iterator[dict]:
+    try:
+        import ijson
+    except ImportError as e:
+        raise ImportError(f"ijson is needed to stream the Jaeger dump {path}.") from e
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "data.item")
+
+
+def jaeger_edges(path: Path) -> Iterator[Edge]:
+    for trace in jaeger_traces(path):
+        processes = trace.get("processes", {})
+        services = {
+            span["spanID"]: processes[span["processID"]]["serviceName"]
+            for span in trace["spans"]
+        }
+        for span in trace["spans"]:
+            for ref in span.get("references", ()):
+                parent = services.get(ref["spanID"])
+                if ref.get("refType") == "CHILD_OF" and parent is not None:
+                    yield parent, services[span["spanID"]]
+
+
+def count_calls(paths: Iterable[str | Path], capacity: int = 1_000_000) -> Counter:
+    """Calls between services over all the span files, in one streaming pass."""
+    calls = Counter()
+    index = SpanIndex(capacity)
+    for path in map(Path, paths):
+        edges = (
+            jaeger_edges(path) if path.suffix == ".json" else otel_edges(path, index)
+        )
+        for caller, callee in edges:
+            if caller != callee:
+                calls[caller, callee] += 1
+    if index.dropped or index.waiting:
+        log.warning(
+            f"{index.dropped + sum(map(len, index.waiting.values()))} spans "
+            "never met their parent, raise the capacity if that is a lot."
+        )
+    return calls
+
+
+def to_service_map(
+    calls: Counter, base: dict | None = None, min_calls: int = 1
+) -> dict:
+    """
+    The map in the format read by `ServiceGraph.from_config`, with the call
+    counts under `edges` of the caller, keyed by the callee's id. The nodes
+    and edges of `base` (a map loaded from yaml) are kept, with their ids and
+    edge attributes, a traced edge only setting its `calls`.
+    """
+    base_nodes = (base or {}).get("nodes", ())
+    ids = {n["service"]: n["id"] for n in base_nodes}
+    edges = {edge: n for edge, n in calls.items() if n >= min_calls}
+    next_id = max(ids.values(), default=0) + 1
+    for service in sorted({s for edge in edges for s in edge} - ids.keys()):
+        ids[service] = next_id
+        next_id += 1
+
+    nodes = {
+        id: {"id": id, "service": service, "children": set(), "parents": set()}
+        for service, id in ids.items()
+    }
+    attrs = {id: {} for id in nodes}
+
+    def link(caller: int, callee: int):
+        for id in (caller, callee):
+            if id not in nodes:  # referenced by the base map, never named.
+                nodes[id] = {
+                    "id": id,
+                    "service": str(id),
+                    "children": set(),
+                    "parents": set(),
+                }
+                attrs[id] = {}
+        nodes[caller]["parents"].add(callee)
+        nodes[callee]["children"].add(caller)
+
+    for node in base_nodes:
+        for parent_id in node.get("parents") or ():
+            link(node["id"], parent_id)
+        for child_id in node.get("children") or ():
+            link(child_id, node["id"])
+        for parent_id, edge in (node.get("edges") or {}).items():
+            link(node["id"], int(parent_id))
+            attrs[node["id"]][int(parent_id)] = dict(edge or {})
+
+    for (caller, callee), n in edges.items():
+        link(ids[caller], ids[callee])
+        attrs[ids[caller]].setdefault(ids[callee], {})["calls"] = n
+
+    return {
+        "nodes": [
+            {
+                **nodes[id],
+                "children": sorted(nodes[id]["children"]),
+                "parents": sorted(nodes[id]["parents"]),
+                "edges": dict(sorted(attrs[id].items())),
+            }
+            for id in sorted(nodes)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("spans", nargs="+", help="span dumps, .jsonl or .json")
+    parser.add_argument("-o", "--output", default="service_dependancy_map.yaml")
+    parser.add_argument(
+        "--base", help="existing map whose services, ids and edges are kept"
+    )
+    parser.add_argument("--min-calls", type=int, default=1)
+    parser.add_argument("--capacity", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    base = None
+    if args.base:
+        with open(args.base, "r") as f:
+            base = yaml.safe_load(f)
+
+    calls = count_calls(args.spans, args.capacity)
+    service_map = to_service_map(calls, base, args.min_calls)
+    with open(args.output, "w") as f:
+        yaml.safe_dump(service_map, f, sort_keys=False)
+    print(f"Wrote {len(service_map['nodes'])} services, {len(calls)} edges.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from abc import ABC, abstractmethod
+
+from src.config import cfg
+
+
+class BaseLinkStore(ABC):
+    """
+    Holds the learned `(parent_id, child_id) -> [alpha, beta]` link counts.
+
+    Besides the mapping interface used by the detector, implementations keep
+    an adjacency index so the links touching an alert can be found without
+    scanning the whole table.
+
+    Counts must be updated by assigning the pair back (`links[key] = [a, b]`),
+    mutating the returned list in place bypasses the indexes.
+    """
+
+    @abstractmethod
+    def __getitem__(self, key: tuple[str, str]) -> list[int]:
+        """Returns the counts of a link, creating it with the initial counts."""
+        pass
+
+    @abstractmethod
+    def __setitem__(self, key: tuple[str, str], value: list[int]):
+        pass
+
+    @abstractmethod
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def get(self, key: tuple[str, str], default=None):
+        pass
+
+    @abstractmethod
+    def items(self):
+        pass
+
+    @abstractmethod
+    def children_of(self, parent_id: str):
+        """Ids that have a link coming from `parent_id`, in insertion order."""
+        pass
+
+    @abstractmethod
+    def parents_of(self, child_id: str):
+        """Ids that have a link going to `child_id`, in insertion order."""
+        pass
+
+    def best_parent_alpha(self, child_id: str):
+        """
+        Highest alpha over the links going to `child_id`, None when there is
+        no such link.
+        """
+        return max(
+            (self.get((p, child_id))[0] for p in self.parents_of(child_id)),
+            default=None,
+        )
+
+    def add_counts(self, links: dict):
+        """
+        Adds the counts learned into another table, each of its links
+        started from the initial counts that are not added again.
+        """
+        for key, (alpha, beta) in links.items():
+            curr_alpha, curr_beta = self.get(key, (cfg.initial_alpha, cfg.initial_beta))
+            self[key] = [
+                curr_alpha + alpha - cfg.initial_alpha,
+                curr_beta + beta - cfg.initial_beta,
+            ]
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    def __iter__(self):
+        return self.keys()
@@ -0,0 +1,227 @@
+import mmap
+import os
+import struct
+from array import array
+
+from . import BaseLinkStore, DictLinkStore
+
+MAGIC = b"RCLK"
+VERSION = 1
+# magic, version, ids, links, hash slots, id blob size
+HEADER = struct.Struct("<4sIIIIQ")
+EMPTY = -1
+GOLDEN = 0x9E3779B97F4A7C15
+
+
+def _slot(key: int, mask: int) -> int:
+    return ((key * GOLDEN) >> 32) & mask
+
+
+def _aligned(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class BinaryLinkStore(BaseLinkStore):
+    """
+    Link table memory-mapped read-only from a file written by `write`, so
+    worker processes opening the same file share its pages.
+
+    Alert ids are interned into integer codes, a link is the int64 key
+    `parent_code << 32 | child_code` with its alpha and beta in packed int32
+    arrays, found through an open addressing hash index. Rows grouped by
+    parent and by child serve `children_of` and `parents_of`.
+
+    Updates never touch the file: changed counts and new links are kept in
+    memory on top of it.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_ids, n_links, n_slots, blob_size = HEADER.unpack_from(self.mm)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} link table")
+        self.n_links = n_links
+        self.mask = n_slots - 1
+
+        view = memoryview(self.mm)
+        offset = HEADER.size
+
+        def section(fmt, count, size):
+            nonlocal offset
+            data = view[offset : offset + count * size].cast(fmt)
+            offset += _aligned(count * size)
+            return data
+
+        id_off = section("I", n_ids + 1, 4)
+        blob = self.mm[offset : offset + blob_size]
+        offset += _aligned(blob_size)
+        self.ids = [blob[id_off[i] : id_off[i + 1]].decode() for i in range(n_ids)]
+        self.codes = {id: code for code, id in enumerate(self.ids)}
+        id_off.release()
+
+        self.keys_ = section("q", n_links, 8)
+        self.alpha = section("i", n_links, 4)
+        self.beta = section("i", n_links, 4)
+        self.parent_off = section("I", n_ids + 1, 4)
+        self.child_off = section("I", n_ids + 1, 4)
+        self.by_child = section("I", n_links, 4)
+        self.slots = section("i", n_slots, 4)
+        self.views = [
+            self.keys_,
+            self.alpha,
+            self.beta,
+            self.parent_off,
+            self.child_off,
+            self.by_child,
+            self.slots,
+            view,
+        ]
+
+        # counts changed since the file was written, and links it lacks.
+        self.updates: dict[tuple[str, str], list[int]] = {}
+        self.added = DictLinkStore()
+
+    @staticmethod
+    def write(path: str, links: BaseLinkStore | dict):
+        """Writes `links` in the format read by the constructor, atomically."""
+        codes: dict[str, int] = {}
+        keys, alpha, beta = array("q"), array("i"), array("i")
+        for (p, c), (a, b) in links.items():
+            p_code = codes.setdefault(p, len(codes))
+            c_code = codes.setdefault(c, len(codes))
+            keys.append(p_code << 32 | c_code)
+            alpha.append(a)
+            beta.append(b)
+        n_ids, n_links = len(codes), len(keys)
+
+        # rows by parent and by child, insertion order is kept inside a row.
+        order = sorted(range(n_links), key=lambda i: keys[i] >> 32)
+        position = array("I", [0] * n_links)
+        for new, old in enumerate(order):
+            position[old] = new
+        by_child = array(
+            "I",
+            (
+                position[i]
+                for i in sorted(range(n_links), key=lambda i: keys[i] & 0xFFFFFFFF)
+            ),
+        )
+        keys = array("q", (keys[i] for i in order))
+        alpha = array("i", (alpha[i] for i in order))
+        beta = array("i", (beta[i] for i in order))
+
+        def row_offsets(row_of):
+            offsets = array("I", [0] * (n_ids + 1))
+            for i in range(n_links):
+                offsets[row_of(i) + 1] += 1
+            for code in range(n_ids):
+                offsets[code + 1] += offsets[code]
+            return offsets
+
+        parent_off = row_offsets(lambda i: keys[i] >> 32)
+        child_off = row_offsets(lambda i: keys[i] & 0xFFFFFFFF)
+
+        n_slots = 1
+        while n_slots < 2 * n_links:
+            n_slots *= 2
+        slots, mask = array("i", [EMPTY] * n_slots), n_slots - 1
+        for i, key in enumerate(keys):
+            slot = _slot(key, mask)
+            while slots[slot] != EMPTY:
+                slot = (slot + 1) & mask
+            slots[slot] = i
+
+        encoded = [id.encode() for id in codes]
+        id_off = array("I", [0])
+        for id in encoded:
+            id_off.append(id_off[-1] + len(id))
+        blob = b"".join(encoded)
+
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, n_ids, n_links, n_slots, len(blob)))
+            for data in (
+                id_off,
+                blob,
+                keys,
+                alpha,
+                beta,
+                parent_off,
+                child_off,
+                by_child,
+                slots,
+            ):
+                data = bytes(data)
+                f.write(data)
+                f.write(b"\0" * (_aligned(len(data)) - len(data)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _index(self, key) -> int | None:
+        """Position of `key` in the mapped arrays, None if it is not there."""
+        p_code = self.codes.get(key[0])
+        c_code = self.codes.get(key[1])
+        if p_code is None or c_code is None:
+            return None
+        packed = p_code << 32 | c_code
+        slot = _slot(packed, self.mask)
+        while (i := self.slots[slot]) != EMPTY:
+            if self.keys_[i] == packed:
+                return i
+            slot = (slot + 1) & self.mask
+        return None
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        if i is None:
+            return self.added[key]
+        return self.updates.get(key) or [self.alpha[i], self.beta[i]]
+
+    def __setitem__(self, key, value):
+        if self._index(key) is None:
+            self.added[key] = value
+        else:
+            self.updates[key] = value
+
+    def __contains__(self, key) -> bool:
+        return self._index(key) is not None or key in self.added
+
+    def __len__(self) -> int:
+        return self.n_links + len(self.added)
+
+    def get(self, key, default=None):
+        i = self._index(key)
+        if i is None:
+            return self.added.get(key, default)
+        return self.updates.get(key) or [self.alpha[i], self.beta[i]]
+
+    def items(self):
+        for i, packed in enumerate(self.keys_):
+            key = (self.ids[packed >> 32], self.ids[packed & 0xFFFFFFFF])
+            yield key, self.updates.get(key) or [self.alpha[i], self.beta[i]]
+        yield from self.added.items()
+
+    def children_of(self, parent_id):
+        children = []
+        code = self.codes.get(parent_id)
+        if code is not None:
+            start, end = self.parent_off[code], self.parent_off[code + 1]
+            children = [self.ids[k & 0xFFFFFFFF] for k in self.keys_[start:end]]
+        return children + list(self.added.children_of(parent_id))
+
+    def parents_of(self, child_id):
+        parents = []
+        code = self.codes.get(child_id)
+        if code is not None:
+            start, end = self.child_off[code], self.child_off[code + 1]
+            parents = [self.ids[self.keys_[i] >> 32] for i in self.by_child[start:end]]
+        return parents + list(self.added.parents_of(child_id))
+
+    def close(self):
+        for view in self.views:
+            view.release()
+        self.mm.close()
@@ -0,0 +1,56 @@
+from src.config import cfg
+from . import BaseLinkStore
+
+
+class DictLinkStore(BaseLinkStore):
+    def __init__(self, links: dict | None = None) -> None:
+        self.links: dict[tuple[str, str], list[int]] = {}
+
+        # adjacency index, dicts are used as ordered sets.
+        self.children: dict[str, dict[str, None]] = {}
+        self.parents: dict[str, dict[str, None]] = {}
+
+        # child -> highest alpha of its incoming links.
+        self.best_incoming: dict[str, int | None] = {}
+
+        for key, value in (links or {}).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key not in self.links:
+            self[key] = [cfg.initial_alpha, cfg.initial_beta]
+        return self.links[key]
+
+    def __setitem__(self, key, value):
+        if key not in self.links:
+            parent, child = key
+            self.children.setdefault(parent, {})[child] = None
+            self.parents.setdefault(child, {})[parent] = None
+        self.links[key] = value
+        self.best_incoming.pop(key[1], None)
+
+    def __contains__(self, key) -> bool:
+        return key in self.links
+
+    def __len__(self) -> int:
+        return len(self.links)
+
+    def get(self, key, default=None):
+        return self.links.get(key, default)
+
+    def items(self):
+        return self.links.items()
+
+    def keys(self):
+        return self.links.keys()
+
+    def children_of(self, parent_id):
+        return self.children.get(parent_id, {}).keys()
+
+    def parents_of(self, child_id):
+        return self.parents.get(child_id, {}).keys()
+
+    def best_parent_alpha(self, child_id):
+        if child_id not in self.best_incoming:
+            self.best_incoming[child_id] = super().best_parent_alpha(child_id)
+        return self.best_incoming[child_id]
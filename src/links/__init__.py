@@ -0,0 +1,4 @@
+from .__base import BaseLinkStore
+from .__dict_links import DictLinkStore
+from .__snapshot import LinkSnapshot
+from .__binary_links import BinaryLinkStore
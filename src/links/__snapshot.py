@@ -0,0 +1,92 @@
+import json
+import os
+from pathlib import Path
+
+from . import BaseLinkStore, DictLinkStore
+
+
+class LinkSnapshot:
+    """
+    On-disk copy of the learned link model, kept in `directory`:
+
+    - `links.json`: the link table with alert ids stored once in an id table,
+      the historical store counts of the alerts and the watermark (start time
+      in epoch microseconds) of the last historical alert that went in.
+    - `deltas.jsonl`: append-only log of the links changed online (feedback)
+      since the snapshot was written, replayed on load.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / "links.json"
+        self.delta_path = self.directory / "deltas.jsonl"
+        self.delta_file = None
+
+    def load(self) -> tuple[DictLinkStore, dict[str, int], int | None]:
+        """Returns the links, the store counts and the watermark."""
+        links = DictLinkStore()
+        counts, watermark = {}, None
+
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "r") as f:
+                snap = json.load(f)
+            ids = snap["ids"]
+            for p, c, alpha, beta in snap["links"]:
+                links[(ids[p], ids[c])] = [alpha, beta]
+            counts = snap["counts"]
+            watermark = snap["watermark"]
+
+        if self.delta_path.exists():
+            with open(self.delta_path, "r") as f:
+                for line in f:
+                    # a torn last line is what a crash mid-write leaves.
+                    try:
+                        p, c, alpha, beta = json.loads(line)
+                    except ValueError:
+                        continue
+                    links[(p, c)] = [alpha, beta]
+
+        return links, counts, watermark
+
+    def save(self, links: BaseLinkStore, counts: dict[str, int], watermark: int):
+        """Writes a new snapshot atomically and starts an empty delta log."""
+        code: dict[str, int] = {}
+        rows = []
+        for (p, c), (alpha, beta) in links.items():
+            p_code = code.setdefault(p, len(code))
+            c_code = code.setdefault(c, len(code))
+            rows.append([p_code, c_code, alpha, beta])
+
+        tmp = self.snapshot_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    "watermark": watermark,
+                    "ids": list(code),
+                    "links": rows,
+                    "counts": counts,
+                },
+                f,
+                separators=(",", ":"),
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+        if self.delta_file:
+            self.delta_file.close()
+            self.delta_file = None
+        self.delta_path.unlink(missing_ok=True)
+
+    def append(self, key: tuple[str, str], value: list[int]):
+        """Logs the new counts of a link changed online."""
+        if self.delta_file is None:
+            self.delta_file = open(self.delta_path, "a")
+        self.delta_file.write(json.dumps([*key, *value]) + "\n")
+        self.delta_file.flush()
+
+    def close(self):
+        if self.delta_file:
+            self.delta_file.close()
+            self.delta_file = None
@@ -0,0 +1,63 @@
+from collections import OrderedDict
+import time
+
+from src import metrics
+from src.message_queue import fingerprint
+
+
+class DedupCache:
+    """
+    Remembers the last status seen for every alert, so the re-sends that
+    alertmanager does every `repeat_interval` are dropped before they reach
+    the queue. Only status changes (firing -> resolved) go through.
+
+    An entry expires `ttl` seconds after the alert was last received, the
+    dropped re-sends included, so a steadily firing alert stays known as
+    long as it is re-sent more often than `ttl`.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        # ordered by last time seen, so expired entries are at the front.
+        self.seen: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.dropped = metrics.counter("dedup.dropped_alerts")
+        self.size = metrics.gauge("dedup.size")
+
+    def _evict(self, now: float):
+        while self.seen:
+            _, expires_at = next(iter(self.seen.values()))
+            if expires_at > now:
+                break
+            self.seen.popitem(last=False)
+
+    def fresh(self, raws: list[dict]) -> list[dict]:
+        """
+        Alerts that are new or changed status, nothing new is remembered yet.
+        The expiry of the dropped re-sends is refreshed.
+        """
+        now = time.monotonic()
+        self._evict(now)
+        batch_seen = {}
+        fresh = []
+        for raw in raws:
+            key = fingerprint(raw)
+            status = raw.get("status")
+            last = batch_seen.get(key, self.seen.get(key, (None,))[0])
+            batch_seen[key] = status
+            if last == status:
+                self.dropped.inc()
+                if key in self.seen:
+                    self.seen.move_to_end(key)
+                    self.seen[key] = (status, now + self.ttl)
+                continue
+            fresh.append(raw)
+        return fresh
+
+    def remember(self, raws: list[dict]):
+        """Records alerts once they got queued, refreshing their expiry."""
+        expires_at = time.monotonic() + self.ttl
+        for raw in raws:
+            key = fingerprint(raw)
+            self.seen.pop(key, None)
+            self.seen[key] = (raw.get("status"), expires_at)
+        self.size.set(len(self.seen))
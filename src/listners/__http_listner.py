@@ -1,8 +1,9 @@
 import logging
 from src.models.feedback import FeedBack
 from src.notifier import WsNotifier
-from . import BaseListener, log
-from src.message_queue import BaseMessageQueue
+from . import BaseListener, DedupCache, log
+from src.message_queue import BaseMessageQueue, QueueFullError
+from src import metrics
 from aiohttp import web
 
 
@@ -37,8 +38,14 @@ this is the structure of the alert that will be sent by alertmanager
 
 
 class HTTPListener(BaseListener):
-    def __init__(self, work_queue: BaseMessageQueue, notifier: WsNotifier) -> None:
+    def __init__(
+        self,
+        work_queue: BaseMessageQueue,
+        notifier: WsNotifier,
+        dedup: DedupCache | None = None,
+    ) -> None:
         self.work_queue = work_queue
+        self.dedup = dedup
         self.app = web.Application()
         self.fb_handler = None
         self.w_sockets = set()
@@ -48,6 +55,7 @@ class HTTPListener(BaseListener):
                 web.post("/alerts", self.receive_alert),
                 web.post("/feedback", self.receive_feedback),
                 web.get("/ws", self.web_socket_handler),
+                web.get("/metrics", self.metrics_handler),
                 web.delete("/batch", self.batch_delete_handler),
             ]
         )
@@ -69,17 +77,34 @@ class HTTPListener(BaseListener):
         except Exception:
             return web.Response(status=400)
 
-        self.work_queue.put_nowait(convert_to_alerts(alerts))
+        alerts = convert_to_alerts(alerts)
+        if self.dedup:
+            alerts = self.dedup.fresh(alerts)
+            if not alerts:
+                return web.Response(status=200)
 
+        try:
+            self.work_queue.put_nowait(alerts)
+        except QueueFullError as e:
+            # alertmanager retries on 5xx, so the payload is not lost.
+            logger.warning(f"Rejecting alerts: {e}")
+            return web.Response(status=503, headers={"Retry-After": "5"})
+
+        if self.dedup:
+            self.dedup.remember(alerts)
         return web.Response(status=200)
 
+    async def metrics_handler(self, request: web.Request):
+        return web.json_response(metrics.snapshot())
+
     async def receive_feedback(self, request: web.Request):
         """Processes the feedback from json to custom Feedback type and sends to detector"""
         # add logic to change feedback to normal thing
-        fb = FeedBack(await request.json())  # change
+        fb = FeedBack(await request.text())  # change
 
         if self.fb_handler:
-            self.fb_handler(fb)
+            await self.fb_handler(fb)
+        return web.Response(status=200)
 
     def set_feedback_listner(self, handler):
         self.fb_handler = handler
@@ -3,4 +3,5 @@ from .__base import BaseListener
 
 
 log = logging.getLogger(__package__)
+from .__dedup import DedupCache
 from .__http_listner import HTTPListener
@@ -1,6 +1,7 @@
 from pathlib import Path
 import sys
 import os
+from typing import Iterable
 
 from src.graph.__base import BaseGraph
 from src.storage.__base import BaseAlertStore
@@ -11,34 +12,77 @@ import asyncio
 import json
 
 from src.notifier import WsNotifier
-from src.graph import ServiceGraph
-from src.listners import HTTPListener
-from src.message_queue import AsyncQueue
+from src.graph import CSRServiceGraph, ServiceGraph
+from src.listners import DedupCache, HTTPListener
+from src.message_queue import AsyncQueue, BoundedQueue, OverflowPolicy
 from src.detector import ProbabilityDetector
-from src.storage import DictStore
-from src.preprocessing.causal_inference import compute_alpha_beta_links
-from src.models.alert import Alert
+from src.storage import CachedStore, DictStore, SQLiteStore
+from src.models import Alert
+from src.preprocessing.causal_inference import (
+    UnsortedHistoryError,
+    compute_alpha_beta_links,
+)
+from src.preprocessing.history import load_alert_history, stream_alert_history
+from src.links import BinaryLinkStore, DictLinkStore, LinkSnapshot
 from src.preprocessing.csv_preprocessor import load_and_preprocess
+from src.config import cfg
 
 
-async def preprocess(graph: BaseGraph, store: BaseAlertStore):
+def tally(alerts: Iterable[Alert], ids: set[str], seen: dict):
+    """Passes sorted alerts through, noting their ids, number and latest start."""
+    for alert in alerts:
+        ids.add(alert.id)
+        seen["alerts"] += 1
+        seen["watermark"] = alert.starts_us
+        yield alert
+
+
+async def preprocess(
+    graph: BaseGraph, store: BaseAlertStore, snapshot: LinkSnapshot | None = None
+):
     """
     Updated preprocessing: reads historical CSV alerts and computes α/β links.
+
+    With a snapshot, the links and store counts saved by the previous run are
+    loaded and only the history past its watermark is processed.
+
+    The CSV is streamed when it is sorted by start time, and read whole and
+    sorted when it is not.
     """
-    import pandas as pd
+    links, counts, watermark = snapshot.load() if snapshot else (None, {}, None)
+    for id, count in counts.items():
+        await store.add_count(id, count)
+    if watermark is not None:
+        print(f"Loaded {len(links)} links from the snapshot.")
 
     csv_path = Path(__file__).parent.parent / "test_data/data/all_alerts.csv"
     if not csv_path.exists():
         print(f"CSV file {csv_path} not found. Skipping preprocessing.")
-        return
-
-    df = pd.read_csv(csv_path)
-    historical_alerts = [Alert(row.to_dict()) for _, row in df.iterrows()]
+        return links
 
     # Compute α/β link strengths using valid historical alerts
-    precomputed_links = await compute_alpha_beta_links(historical_alerts, store, graph)
+    ids, seen = set(counts), {"alerts": 0, "watermark": watermark}
+    try:
+        history = stream_alert_history([csv_path], since_us=watermark)
+        precomputed_links = await compute_alpha_beta_links(
+            tally(history, ids, seen), store, graph
+        )
+    except UnsortedHistoryError as e:
+        print(f"{e}, reading the whole history to sort it.")
+        ids, seen = set(counts), {"alerts": 0, "watermark": watermark}
+        history = sorted(
+            load_alert_history(csv_path, since_us=watermark),
+            key=lambda a: a.starts_us,
+        )
+        precomputed_links = await compute_alpha_beta_links(
+            tally(history, ids, seen), store, graph
+        )
+    if not seen["alerts"]:
+        print("No new historical alerts since the snapshot.")
+        return links
+
     print("Preprocessing summary:")
-    print(f"Total historical alerts used: {len(historical_alerts)}")
+    print(f"Total historical alerts used: {seen['alerts']}")
     print(f"Total computed links: {len(precomputed_links)}")
 
     print("Head of the computed links.")
@@ -47,8 +91,22 @@ async def preprocess(graph: BaseGraph, store: BaseAlertStore):
         if i == 4:
             break
 
-    return precomputed_links
+    if links is None:
+        links = DictLinkStore()
+    links.add_counts(precomputed_links)
+
+    if snapshot:
+        counts = {id: await store.get_history_count(id) for id in ids}
+        snapshot.save(links, counts, seen["watermark"])
+
+    return links
+
 
+async def watch_graph(graph: BaseGraph, interval: float):
+    """Applies the changes made to the dependency map while running."""
+    while True:
+        await asyncio.sleep(interval)
+        await graph.update()
 
 
 def csv_preprocess_example():
@@ -68,20 +126,48 @@ def csv_preprocess_example():
 
 async def main(config):
     notifier = WsNotifier()
-    graph = ServiceGraph("test_data/test_service_map.yaml")
-    mq = AsyncQueue()
-    store = DictStore("test/alerts")
+    graph_map = "test_data/test_service_map.yaml"
+    if cfg.graph_backend == "csr":
+        graph = CSRServiceGraph(graph_map)
+    else:
+        graph = ServiceGraph(graph_map)
+    if cfg.queue_capacity:
+        mq = BoundedQueue(cfg.queue_capacity, OverflowPolicy(cfg.queue_overflow))
+    else:
+        mq = AsyncQueue()
+    if cfg.store == "sqlite":
+        store = SQLiteStore(cfg.sqlite_path)
+    else:
+        store = DictStore("test/alerts")
+        await store.replay()
+    if cfg.store_read_cache:
+        store = CachedStore(store)
     csv_preprocess_example()
-    precomputed_links = await preprocess(graph, store)
-    detector = ProbabilityDetector(graph, mq, store, notifier, precomputed_links)
-    httpserver = HTTPListener(mq, notifier)
+    snapshot = LinkSnapshot(cfg.snapshot_dir) if cfg.snapshot_dir else None
+    precomputed_links = await preprocess(graph, store, snapshot)
+    if cfg.link_store == "binary":
+        if precomputed_links is not None:
+            BinaryLinkStore.write(cfg.link_table, precomputed_links)
+        if os.path.exists(cfg.link_table):
+            precomputed_links = BinaryLinkStore(cfg.link_table)
+    detector = ProbabilityDetector(
+        graph, mq, store, notifier, precomputed_links, snapshot
+    )
+    dedup = DedupCache(cfg.dedup_ttl) if cfg.dedup_ttl else None
+    httpserver = HTTPListener(mq, notifier, dedup)
     httpserver.set_feedback_listner(detector.feedback_handler)
     try:
-        await asyncio.gather(detector.start(), httpserver.listen())
+        tasks = [detector.start(), httpserver.listen()]
+        if cfg.graph_reload_interval:
+            tasks.append(watch_graph(graph, cfg.graph_reload_interval))
+        await asyncio.gather(*tasks)
     except asyncio.CancelledError:
         print()
         await httpserver.close()
         await notifier.free_wsockets()
+        await store.close()
+        if snapshot:
+            snapshot.close()
         raise
 
 
@@ -91,7 +177,7 @@ def parse_config():
 
 if __name__ == "__main__":
     try:
-        cfg = parse_config()
-        asyncio.run(main(cfg))
+        config = parse_config()
+        asyncio.run(main(config))
     except KeyboardInterrupt:
         print("Exiting the application.")
@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
 import asyncio
+from collections import deque
+from enum import Enum
+import time
+
+from src import metrics
 
 
 class BaseMessageQueue(ABC):
@@ -15,6 +20,15 @@ class BaseMessageQueue(ABC):
     async def get(self):
         pass
 
+    @abstractmethod
+    def get_nowait(self):
+        """Raises asyncio.QueueEmpty when nothing is queued."""
+        pass
+
+    @abstractmethod
+    def empty(self) -> bool:
+        pass
+
 
 class AsyncQueue(BaseMessageQueue):
     def __init__(self) -> None:
@@ -28,3 +42,146 @@ class AsyncQueue(BaseMessageQueue):
 
     async def get(self):
         return await self.q.get()
+
+    def get_nowait(self):
+        return self.q.get_nowait()
+
+    def empty(self) -> bool:
+        return self.q.empty()
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class OverflowPolicy(Enum):
+    REJECT = "reject"  # refuse the payload, the sender has to retry
+    DROP_OLDEST = "drop_oldest"  # make room by dropping the oldest payloads
+    COALESCE = "coalesce"  # merge alerts already queued, reject the rest
+
+
+def fingerprint(raw: dict) -> str:
+    """
+    Identity of one firing of an alertmanager alert across its re-sends. The
+    start time is part of it, as alertmanager keeps the fingerprint when the
+    same alert fires again later.
+    """
+    key = raw.get("fingerprint")
+    if not key:
+        labels = raw.get("labels", {})
+        key = f"{labels.get('job')}.{labels.get('instance')}"
+    return f"{key}@{raw.get('startsAt')}"
+
+
+class BoundedQueue(BaseMessageQueue):
+    """
+    Queue of webhook payloads holding at most `capacity` alerts.
+
+    What happens to a payload that doesn't fit is decided by `policy`. A
+    payload is always accepted into an empty queue, so a single payload
+    larger than the capacity can't block the queue.
+    """
+
+    def __init__(
+        self, capacity: int, policy: OverflowPolicy = OverflowPolicy.REJECT
+    ) -> None:
+        self.capacity = capacity
+        self.policy = policy
+
+        self.items: deque[tuple[float, list]] = deque()
+        self.size = 0  # alerts over all queued payloads
+        self.pending: dict[str, dict] = {}  # fingerprint -> queued alert
+        self.not_empty = asyncio.Event()
+        self.not_full = asyncio.Event()
+
+        self.depth = metrics.gauge("queue.depth")
+        self.latency = metrics.gauge("queue.latency_seconds")
+        self.rejected = metrics.counter("queue.rejected_alerts")
+        self.dropped = metrics.counter("queue.dropped_alerts")
+        self.coalesced = metrics.counter("queue.coalesced_alerts")
+
+    def _fits(self, n: int) -> bool:
+        return not self.items or self.size + n <= self.capacity
+
+    def _append(self, event: list):
+        self.items.append((time.monotonic(), event))
+        self.size += len(event)
+        if self.policy == OverflowPolicy.COALESCE:
+            for raw in event:
+                self.pending[fingerprint(raw)] = raw
+        self.depth.set(self.size)
+        self.not_empty.set()
+
+    def _remove(self) -> tuple[float, list]:
+        """Takes the oldest payload off the queue, consumed or dropped."""
+        enqueued_at, event = self.items.popleft()
+        self.size -= len(event)
+        if self.policy == OverflowPolicy.COALESCE:
+            for raw in event:
+                key = fingerprint(raw)
+                if self.pending.get(key) is raw:
+                    del self.pending[key]
+        self.depth.set(self.size)
+        self.not_full.set()
+        return enqueued_at, event
+
+    def _popleft(self) -> list:
+        enqueued_at, event = self._remove()
+        self.latency.set(time.monotonic() - enqueued_at)
+        return event
+
+    def _coalesce(self, event: list) -> list:
+        """Updates queued copies of the alerts in place, returns the new ones."""
+        rest = []
+        for raw in event:
+            queued = self.pending.get(fingerprint(raw))
+            if queued is None:
+                rest.append(raw)
+                continue
+            queued.clear()
+            queued.update(raw)
+            self.coalesced.inc()
+        return rest
+
+    def put_nowait(self, event: list):
+        if self._fits(len(event)):
+            self._append(event)
+            return
+
+        if self.policy == OverflowPolicy.COALESCE:
+            event = self._coalesce(event)
+            if not event:
+                return
+            if self._fits(len(event)):
+                self._append(event)
+                return
+
+        if self.policy == OverflowPolicy.DROP_OLDEST:
+            while not self._fits(len(event)):
+                self.dropped.inc(len(self._remove()[1]))
+            self._append(event)
+            return
+
+        self.rejected.inc(len(event))
+        raise QueueFullError(f"queue is full ({self.size}/{self.capacity} alerts)")
+
+    async def put(self, event: list):
+        """Waits for room instead of applying the overflow policy."""
+        while not self._fits(len(event)):
+            self.not_full.clear()
+            await self.not_full.wait()
+        self._append(event)
+
+    async def get(self):
+        while not self.items:
+            self.not_empty.clear()
+            await self.not_empty.wait()
+        return self._popleft()
+
+    def get_nowait(self):
+        if not self.items:
+            raise asyncio.QueueEmpty
+        return self._popleft()
+
+    def empty(self) -> bool:
+        return not self.items
@@ -0,0 +1,57 @@
+import time
+from collections import deque
+
+
+class Gauge:
+    """
+    Latest value of a measurement plus a bounded history of
+    `(timestamp, value)` samples, taken at most once every `interval` seconds.
+    """
+
+    def __init__(self, name: str, history: int = 1024, interval: float = 1.0) -> None:
+        self.name = name
+        self.value = 0
+        self.interval = interval
+        self.samples: deque[tuple[float, float]] = deque(maxlen=history)
+
+    def set(self, value):
+        self.value = value
+        now = time.time()
+        if not self.samples or now - self.samples[-1][0] >= self.interval:
+            self.samples.append((now, value))
+
+    def to_dict(self) -> dict:
+        return {"value": self.value, "samples": list(self.samples)}
+
+
+class Counter:
+    """Monotonic count of events."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.value = 0
+
+    def inc(self, n: int = 1):
+        self.value += n
+
+    def to_dict(self) -> dict:
+        return {"value": self.value}
+
+
+registry: dict[str, Gauge | Counter] = {}
+
+
+def gauge(name: str) -> Gauge:
+    if name not in registry:
+        registry[name] = Gauge(name)
+    return registry[name]
+
+
+def counter(name: str) -> Counter:
+    if name not in registry:
+        registry[name] = Counter(name)
+    return registry[name]
+
+
+def snapshot() -> dict:
+    return {name: m.to_dict() for name, m in registry.items()}
@@ -1,6 +1,7 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-import hashlib
+from functools import lru_cache
+from sys import intern
 
 from .node import GraphNode
 
@@ -13,43 +14,168 @@ class ALERT_STATE(Enum):
 status = {"resolved": ALERT_STATE.RESOLVED, "firing": ALERT_STATE.FIRING}
 
 
-# def change_to_date(t_str):
-#     dt = datetime.strptime(t_str, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
-#     return dt
+@lru_cache(maxsize=8192)
+def change_to_date(t_str):
+    """
+    Parses an RFC3339 timestamp into an aware UTC datetime. Accepts a `Z`
+    suffix, numeric offsets and fractional seconds, timestamps without a
+    zone are taken as UTC.
 
+    Results are memoized as the same timestamps come in over and over again
+    (both ends of an alert, re-sends, alerts of one incident).
+    """
+    if t_str[-1] in "zZ":
+        t_str = t_str[:-1] + "+00:00"
+    dt = datetime.fromisoformat(t_str)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
 
-def change_to_date(t_str):
-    # Accepts both with and without milliseconds
-    try:
-        return datetime.strptime(t_str, "%Y-%m-%dT%H:%M:%S.%f").replace(
-            tzinfo=timezone.utc
-        )
-    except ValueError:
-        return datetime.strptime(t_str, "%Y-%m-%dT%H:%M:%S").replace(
-            tzinfo=timezone.utc
-        )
+
+def to_epoch_us(dt: datetime) -> int:
+    return (dt - EPOCH) // MICROSECOND
+
+
+def from_epoch_us(us: int) -> datetime:
+    return EPOCH + timedelta(microseconds=us)
 
 
 class Alert:
+    """
+    A single alert from alertmanager.
+
+    Instances are slotted to keep large histories small: label values and
+    annotations are interned (a handful of services raise the same alerts
+    over and over), and times are kept as integer microseconds since the
+    epoch with `startsAt` / `endsAt` decoded on access.
+    """
+
+    __slots__ = (
+        "id",
+        "service_name",
+        "service",
+        "severity",
+        "instance",
+        "starts_us",
+        "ends_us",
+        "status",
+        "is_root_cause",
+        "parent_count",
+        "parent_id",
+        "description",
+        "summary",
+        "group",
+        "batch",
+        "__weakref__",  # stores find alerts still in use, see SQLiteStore
+    )
+
     def __init__(self, alert_json: dict) -> None:
-        self.alert = alert_json
-        self.service_name = alert_json["labels"]["job"]
-        # self.service = alert_json["labels"]["job"]
-        self.service = GraphNode.get_id(self.service_name)
-        self.severity = alert_json["labels"]["severity"]
-        self.startsAt = change_to_date(alert_json["startsAt"])
-        self.endsAt = change_to_date(alert_json["endsAt"])
-        self.status = status[alert_json["status"]]
+        labels = alert_json["labels"]
+        annotations = alert_json["annotations"]
+        self._fill(
+            labels["job"],
+            GraphNode.get_id(labels["job"]),
+            str(labels["instance"]),
+            labels["severity"],
+            to_epoch_us(change_to_date(alert_json["startsAt"])),
+            to_epoch_us(change_to_date(alert_json["endsAt"])),
+            status[alert_json["status"]],
+            annotations["description"],
+            annotations["summary"],
+        )
+
+    @classmethod
+    def from_record(
+        cls,
+        service_name: str,
+        service: int,
+        instance: str,
+        severity: str,
+        starts_us: int,
+        ends_us: int,
+        state: ALERT_STATE,
+        description: str,
+        summary: str,
+    ) -> "Alert":
+        """Builds an alert from already decoded fields, used by bulk loaders."""
+        alert = cls.__new__(cls)
+        alert._fill(
+            service_name,
+            service,
+            instance,
+            severity,
+            starts_us,
+            ends_us,
+            state,
+            description,
+            summary,
+        )
+        return alert
+
+    def _fill(
+        self,
+        service_name,
+        service,
+        instance,
+        severity,
+        starts_us,
+        ends_us,
+        state,
+        description,
+        summary,
+    ):
+        self.service_name = intern(service_name)
+        self.service = service
+        self.severity = intern(severity)
+        self.instance = intern(instance)
+        self.starts_us = starts_us
+        self.ends_us = ends_us
+        self.status = state
         self.is_root_cause = False
 
         self.parent_count = 0
         self.parent_id = ""  # gets updated somewhere.
 
-        self.description = alert_json["annotations"]["description"]
-        self.summary = alert_json["annotations"]["summary"]
+        self.description = intern(description)
+        self.summary = intern(summary)
+
+        self.id = intern(f"{self.service}.{self.instance}")
+
+        # set by the detector.
+        self.group = None
+        self.batch = None
+
+    @staticmethod
+    def service_of(id: str) -> int:
+        """Service of an alert id, ids being `<service>.<instance>`."""
+        return int(id.split(".", 1)[0])
 
-        # self.id = self.__get_id()
-        self.id = f"{self.service}.{self.alert['labels']['instance']}"
+    @property
+    def startsAt(self) -> datetime:
+        return from_epoch_us(self.starts_us)
+
+    @property
+    def endsAt(self) -> datetime:
+        return from_epoch_us(self.ends_us)
+
+    @property
+    def alert(self) -> dict:
+        """The alert in the alertmanager format, with the labels that are kept."""
+        return {
+            "labels": {
+                "job": self.service_name,
+                "instance": self.instance,
+                "severity": self.severity,
+            },
+            "startsAt": self.startsAt.isoformat(),
+            "endsAt": self.endsAt.isoformat(),
+            "status": self.status.name.lower(),
+            "annotations": {"description": self.description, "summary": self.summary},
+        }
 
     def __str__(self) -> str:
         return f"Alert from service {self.service_name} with name `{self.description}` started at {self.startsAt} with severity {self.severity}"
@@ -64,8 +190,3 @@ class Alert:
 
     def __repr__(self) -> str:
         return self.id
-
-    def __get_id(self) -> str:
-        s = str(frozenset(self.alert["labels"].items()))
-        h = hashlib.sha256(s.encode()).digest()
-        return str(int.from_bytes(h, "big"))[:15]
@@ -15,6 +15,11 @@ class GraphNode:
         self.parents: set[GraphNode] = parents or set()
         self.children: set[GraphNode] = children or set()
 
+        # parent id -> attributes of the edge from it (calls, latency_coupling,
+        # criticality) and the prior derived from them.
+        self.edges: dict[int, dict] = {}
+        self.priors: dict[int, float] = {}
+
         self.srevice_to_id[service] = id
 
     def __hash__(self) -> int:
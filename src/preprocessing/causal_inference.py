@@ -1,27 +1,40 @@
 from collections import defaultdict
-from hashlib import sha256
-import itertools
+from hashlib import blake2b
+import logging
 import sys
-from typing import List, Dict, Tuple
+from typing import Dict, Iterable, Iterator, List, Tuple
 from statistics import mean
 import random
 
-from src.models import Alert
+from src.models import Alert, MICROSECOND
 from src.storage import BaseAlertStore
 from src.config import cfg
+from .vectorised import compute_links_vectorised
+from .parallel import compute_links_parallel
+
+log = logging.getLogger(__name__)
 
 
 def is_temporally_valid(parent_alert, child_alert, delta=cfg.time_delta) -> bool:
     return (
-        parent_alert.startsAt <= child_alert.startsAt <= parent_alert.startsAt + delta
+        parent_alert.starts_us
+        <= child_alert.starts_us
+        <= parent_alert.starts_us + delta // MICROSECOND
     )
 
 
-def batch_alerts(
-    alerts: List[Alert], gap_threshold=cfg.batch_gap_threshold
-) -> List[List[Alert]]:
-    alerts = sorted(alerts, key=lambda a: a.startsAt)
-    batches = []
+class UnsortedHistoryError(ValueError):
+    """Raised when a stream of alerts goes back in time."""
+
+
+def iter_batches(
+    alerts: Iterable[Alert], gap_threshold=cfg.batch_gap_threshold
+) -> Iterator[List[Alert]]:
+    """
+    Splits a stream of alerts sorted by start time into batches on the gaps
+    longer than `gap_threshold`, yielding each batch as soon as it closes.
+    """
+    gap_us = gap_threshold // MICROSECOND
     current_batch = []
 
     for alert in alerts:
@@ -29,34 +42,63 @@ def batch_alerts(
             current_batch.append(alert)
             continue
 
-        if alert.startsAt - current_batch[-1].startsAt > gap_threshold:
-            batches.append(current_batch)
+        if alert.starts_us < current_batch[-1].starts_us:
+            raise UnsortedHistoryError(
+                f"Alert stream is not sorted by start time at {alert}"
+            )
+
+        if alert.starts_us - current_batch[-1].starts_us > gap_us:
+            yield current_batch
             current_batch = [alert]
         else:
             current_batch.append(alert)
 
     if current_batch:
-        batches.append(current_batch)
+        yield current_batch
+
 
-    return batches
+def batch_alerts(
+    alerts: List[Alert], gap_threshold=cfg.batch_gap_threshold
+) -> List[List[Alert]]:
+    alerts = sorted(alerts, key=lambda a: a.starts_us)
+    return list(iter_batches(alerts, gap_threshold))
 
 
-def normalize_batches(batches: List[List[Alert]]) -> List[List[Alert]]:
+def batch_signature(batch: List[Alert]) -> bytes:
+    """64 bit hash of the alert ids in a batch, independent of their order."""
+    ids = sorted(alert.id for alert in batch)
+    return blake2b("\0".join(ids).encode(), digest_size=8).digest()
+
+
+def normalize_batches(
+    batches: Iterable[List[Alert]],
+    reservoir_size=cfg.normalize_reservoir,
+    seed=cfg.normalize_seed,
+) -> List[List[Alert]]:
     """
-    Balances batch type frequencies by resampling to the median count across unique batch hashes.
+    Balances batch type frequencies by resampling to the mean count across unique batch hashes.
+
+    Runs in one pass: every batch signature keeps a reservoir sample of at
+    most `reservoir_size` of its batches, so the target is capped by it.
     """
+    rng = random.Random(seed) if seed is not None else random
 
     batch_counter = defaultdict(int)
     batch_map = defaultdict(list)
 
     for batch in batches:
-        batch_ids = sorted([alert.id for alert in batch])
-        hash_key = sha256("".join(batch_ids).encode()).hexdigest()
+        hash_key = batch_signature(batch)
         batch_counter[hash_key] += 1
-        batch_map[hash_key].append(batch)
-
-    # Use median as target frequency
+        seen = batch_counter[hash_key]
+        reservoir = batch_map[hash_key]
+        if len(reservoir) < reservoir_size:
+            reservoir.append(batch)
+        elif (j := rng.randrange(seen)) < reservoir_size:
+            reservoir[j] = batch
+
+    # Use mean as target frequency
     freq_values = list(batch_counter.values())
+    log.info(f"Total batches: {sum(freq_values)}")
     if not freq_values:
         return []
 
@@ -65,7 +107,7 @@ def normalize_batches(batches: List[List[Alert]]) -> List[List[Alert]]:
     normalized_batches = []
     for hash_key, instances in batch_map.items():
         if len(instances) > target_count:
-            s = random.sample(instances, target_count)
+            s = rng.sample(instances, target_count)
             normalized_batches.extend(s)
         else:
             s = instances
@@ -80,26 +122,30 @@ def process_batch(
     batch: List[Alert], graph, delta=cfg.time_delta
 ) -> Dict[Tuple[str, str], List[int]]:
     links = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
-    service_to_alerts = defaultdict(list)
-
-    for alert in batch:
-        service_to_alerts[alert.service].append(alert)
-
-    for alert in batch:
-        parent_services = graph.get_parents(alert.service)
-        a: set[Alert] = set(
-            [
-                *itertools.chain(
-                    *[service_to_alerts.get(p.id, []) for p in parent_services]
-                ),
-                *service_to_alerts[alert.service],
-            ]
-        )
-        a.remove(alert)
-        recent_alert: Alert = max(a, key=lambda x: x.startsAt, default=None)
-
-        if recent_alert is None:
+
+    # the two latest alerts of every service as (starts_us, position, alert),
+    # latest first. ties on the start time go to the later alert in the batch.
+    latest = defaultdict(list)
+    for pos, alert in enumerate(batch):
+        top = latest[alert.service]
+        top.append((alert.starts_us, pos, alert))
+        top.sort(key=lambda x: x[:2], reverse=True)
+        del top[2:]
+
+    for pos, alert in enumerate(batch):
+        services = {alert.service, *graph.get_parent_ids(alert.service)}
+        recent = None
+        for service in services:
+            for candidate in latest.get(service, ()):
+                if candidate[1] == pos:
+                    continue
+                if recent is None or candidate[:2] > recent[:2]:
+                    recent = candidate
+                break
+
+        if recent is None:
             continue
+        recent_alert: Alert = recent[2]
 
         key = (recent_alert.id, alert.id)
         if is_temporally_valid(recent_alert, alert, delta):
@@ -128,22 +174,39 @@ def process_batch(
 
 
 async def compute_alpha_beta_links(
-    alerts: List[Alert],
+    alerts: Iterable[Alert],
     store: BaseAlertStore,
     graph,
 ) -> Dict[Tuple[str, str], List[int]]:
-    batches = batch_alerts(alerts)
-    normalized_batches = normalize_batches(batches)
-    total_links = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
+    """
+    `alerts` is either a list, sorted here, or an iterator already sorted by
+    start time (see `stream_alert_history`) that is batched as it is read.
+    """
+    if isinstance(alerts, list):
+        alerts = sorted(alerts, key=lambda a: a.starts_us)
+    normalized_batches = normalize_batches(iter_batches(alerts))
 
-    print("Total batches: ", len(batches))
     print("Normalised batches: ", len(normalized_batches))
 
+    if cfg.preprocess_workers > 1 or cfg.preprocess_engine == "numpy":
+        # history replayed from disk, no need to journal it again.
+        for batch in normalized_batches:
+            await store.put_many(batch, journal=False)
+
+        if cfg.preprocess_workers > 1:
+            return compute_links_parallel(
+                normalized_batches,
+                graph,
+                cfg.preprocess_workers,
+                cfg.preprocess_engine,
+            )
+        return compute_links_vectorised(normalized_batches, graph)
+
+    total_links = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
     for batch in normalized_batches:
         batch_links = process_batch(batch, graph)
 
-        for al in batch:
-            await store.put(al.id, al)
+        await store.put_many(batch, journal=False)
 
         for key, (a, b) in batch_links.items():
             total_links[key][0] += a - cfg.initial_alpha
@@ -0,0 +1,115 @@
+import csv
+import heapq
+import json
+import logging
+from pathlib import Path
+from typing import Iterator
+
+from src.models import Alert, GraphNode, change_to_date, status, to_epoch_us
+
+log = logging.getLogger(__name__)
+
+
+def load_alert_history(
+    csv_path: str | Path, since_us: int | None = None
+) -> list[Alert]:
+    """
+    Reads the historical alerts CSV (one flat row per alert with the columns
+    written by generate.py) into `Alert`s. With `since_us` only the alerts
+    starting after it are kept.
+
+    Timestamps, service ids and states are decoded column by column, so the
+    only per row work left is building the alert itself. Rows of services
+    that are not in the graph are skipped.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+
+    service = df["job"].map(GraphNode.srevice_to_id)
+    state = df["status"].map(status)
+    known = service.notna() & state.notna()
+    if not known.all():
+        log.warning(f"Skipping {int((~known).sum())} alerts of unknown services.")
+        df, service, state = df[known], service[known], state[known]
+
+    epoch = pd.Timestamp(0, tz="UTC")
+    us = pd.Timedelta(microseconds=1)
+    starts_us = (
+        pd.to_datetime(df["startsAt"], utc=True, format="ISO8601") - epoch
+    ) // us
+    ends_us = (pd.to_datetime(df["endsAt"], utc=True, format="ISO8601") - epoch) // us
+
+    if since_us is not None:
+        new = starts_us > since_us
+        df, service, state = df[new], service[new], state[new]
+        starts_us, ends_us = starts_us[new], ends_us[new]
+
+    return [
+        Alert.from_record(*fields)
+        for fields in zip(
+            df["job"].tolist(),
+            service.astype(int).tolist(),
+            df["instance"].tolist(),
+            df["severity"].tolist(),
+            starts_us.tolist(),
+            ends_us.tolist(),
+            state.tolist(),
+            df["description"].tolist(),
+            df["summary"].tolist(),
+        )
+    ]
+
+
+def read_alert_csv(csv_path: str | Path) -> Iterator[Alert]:
+    """Yields the alerts of a history CSV one row at a time, in file order."""
+    skipped = 0
+    with open(csv_path, "r", newline="") as f:
+        for row in csv.DictReader(f):
+            service = GraphNode.srevice_to_id.get(row["job"])
+            state = status.get(row["status"])
+            if service is None or state is None:
+                skipped += 1
+                continue
+            yield Alert.from_record(
+                row["job"],
+                int(service),
+                row["instance"],
+                row["severity"],
+                to_epoch_us(change_to_date(row["startsAt"])),
+                to_epoch_us(change_to_date(row["endsAt"])),
+                state,
+                row["description"],
+                row["summary"],
+            )
+    if skipped:
+        log.warning(f"Skipped {skipped} alerts of unknown services in {csv_path}.")
+
+
+def read_alert_jsonl(jsonl_path: str | Path) -> Iterator[Alert]:
+    """Yields the alerts of a file with one alertmanager alert per line."""
+    with open(jsonl_path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield Alert(json.loads(line))
+
+
+def stream_alert_history(
+    paths: list[str | Path], since_us: int | None = None
+) -> Iterator[Alert]:
+    """
+    Merges history files (`.csv` or `.jsonl`), each sorted by start time,
+    into one time ordered stream without reading them into memory, e.g. the
+    day files of a multi-year history.
+    """
+    readers = [
+        (
+            read_alert_jsonl(path)
+            if Path(path).suffix == ".jsonl"
+            else read_alert_csv(path)
+        )
+        for path in paths
+    ]
+    for alert in heapq.merge(*readers, key=lambda a: a.starts_us):
+        if since_us is None or alert.starts_us > since_us:
+            yield alert
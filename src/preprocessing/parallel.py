@@ -0,0 +1,79 @@
+from collections import defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from src.config import cfg
+from src.models import Alert
+
+# what process_batch reads of alerts, cheap to pickle.
+_Record = namedtuple("_Record", "id service starts_us")
+
+
+class _ParentsGraph:
+    """Picklable stand-in for the service graph, holding only the parents."""
+
+    def __init__(self, graph, services) -> None:
+        self.parents = {s: tuple(graph.get_parent_ids(s)) for s in services}
+
+    def get_parent_ids(self, id: int):
+        return self.parents[id]
+
+
+_graph = None
+
+
+def _init_worker(graph: _ParentsGraph):
+    global _graph
+    _graph = graph
+
+
+def _process_shard(shard: List[List[_Record]], engine: str, delta) -> dict:
+    from .causal_inference import process_batch
+    from .vectorised import compute_links_vectorised
+
+    if engine == "numpy":
+        return dict(compute_links_vectorised(shard, _graph, delta))
+
+    total = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
+    for batch in shard:
+        for key, (a, b) in process_batch(batch, _graph, delta).items():
+            total[key][0] += a - cfg.initial_alpha
+            total[key][1] += b - cfg.initial_beta
+    return dict(total)
+
+
+def compute_links_parallel(
+    batches: List[List[Alert]],
+    graph,
+    workers: int,
+    engine: str = "python",
+    delta=cfg.time_delta,
+) -> Dict[Tuple[str, str], List[int]]:
+    """
+    Shards `batches` over a pool of `workers` processes and sums the partial
+    alpha/beta tables.
+
+    Shards are contiguous runs of batches merged back in order, so both the
+    counts and the order of the links are the same for any worker count.
+    The graph is reduced to a parents map and sent once to every worker.
+    """
+    records = [[_Record(a.id, a.service, a.starts_us) for a in b] for b in batches]
+    parents = _ParentsGraph(graph, {r.service for b in records for r in b})
+
+    # a few shards per worker to even out the load.
+    n_shards = min(len(records), workers * 4) or 1
+    size = -(-len(records) // n_shards)
+    shards = [records[i : i + size] for i in range(0, len(records), size)]
+
+    total_links = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
+    with ProcessPoolExecutor(
+        workers, initializer=_init_worker, initargs=(parents,)
+    ) as pool:
+        partials = pool.map(
+            _process_shard, shards, [engine] * len(shards), [delta] * len(shards)
+        )
+        for partial in partials:
+            for key, (a, b) in partial.items():
+                total_links[key][0] += a - cfg.initial_alpha
+                total_links[key][1] += b - cfg.initial_beta
+    return total_links
@@ -0,0 +1,88 @@
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from src.config import cfg
+from src.models import Alert, MICROSECOND
+
+
+def compute_links_vectorised(
+    batches: List[List[Alert]], graph, delta=cfg.time_delta
+) -> Dict[Tuple[str, str], List[int]]:
+    """
+    Same links as summing `process_batch` over `batches`, computed with numpy
+    over all batches at once.
+
+    Alerts are encoded as integer arrays (batch, service code, start, id
+    code). For every alert the most recent other alert of its own or a
+    parent service in the same batch is found with a sort plus a lookup of
+    the two latest alerts per (batch, service), ties going to the alert
+    later in the batch.
+    """
+    import numpy as np
+
+    alerts = [alert for batch in batches for alert in batch]
+    n = len(alerts)
+    links = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
+    if not n:
+        return links
+
+    batch_no = np.repeat(np.arange(len(batches)), [len(b) for b in batches])
+    start = np.fromiter((a.starts_us for a in alerts), np.int64, n)
+    ids, id_code = np.unique([a.id for a in alerts], return_inverse=True)
+    services, svc_code = np.unique([a.service for a in alerts], return_inverse=True)
+    n_svc = len(services)
+
+    # candidate services of every service code (itself + parents) as CSR.
+    code_of = {int(s): i for i, s in enumerate(services)}
+    offsets, flat = [0], []
+    for s in services:
+        cands = {int(s), *graph.get_parent_ids(int(s))}
+        flat.extend(sorted(code_of[c] for c in cands if c in code_of))
+        offsets.append(len(flat))
+    offsets, flat = np.array(offsets), np.array(flat, dtype=np.int64)
+
+    # the two latest alerts of every (batch, service) group.
+    group = batch_no * n_svc + svc_code
+    order = np.lexsort((np.arange(n), start, group))
+    sorted_group = group[order]
+    last = np.flatnonzero(np.r_[sorted_group[1:] != sorted_group[:-1], True])
+    group_keys = sorted_group[last]
+    top1 = order[last]
+    prev = np.maximum(last - 1, 0)
+    top2 = np.where((last > 0) & (sorted_group[prev] == group_keys), order[prev], -1)
+
+    # one row per (alert, candidate service).
+    counts = offsets[svc_code + 1] - offsets[svc_code]
+    row_alert = np.repeat(np.arange(n), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    row_svc = flat[np.repeat(offsets[svc_code], counts) + within]
+
+    key = batch_no[row_alert] * n_svc + row_svc
+    slot = np.minimum(np.searchsorted(group_keys, key), len(group_keys) - 1)
+    found = group_keys[slot] == key
+    chosen = np.where(top1[slot] == row_alert, top2[slot], top1[slot])
+    ok = found & (chosen >= 0)
+    row_alert, chosen = row_alert[ok], chosen[ok]
+
+    # latest candidate per alert, ties to the later position.
+    order = np.lexsort((chosen, start[chosen], row_alert))
+    row_alert, chosen = row_alert[order], chosen[order]
+    last = np.flatnonzero(np.r_[row_alert[1:] != row_alert[:-1], True])
+    child, parent = row_alert[last], chosen[last]
+
+    delta_us = delta // MICROSECOND
+    valid = (start[parent] <= start[child]) & (start[child] <= start[parent] + delta_us)
+
+    pair = id_code[parent].astype(np.int64) * len(ids) + id_code[child]
+    uniq, first, inverse = np.unique(pair, return_index=True, return_inverse=True)
+    alpha = np.bincount(inverse, weights=valid, minlength=len(uniq))
+    beta = np.bincount(inverse, weights=~valid, minlength=len(uniq))
+
+    # keep the order in which the python engine first meets every link.
+    for i in np.argsort(first, kind="stable"):
+        p, c = divmod(int(uniq[i]), len(ids))
+        links[(str(ids[p]), str(ids[c]))] = [
+            cfg.initial_alpha + int(alpha[i]),
+            cfg.initial_beta + int(beta[i]),
+        ]
+    return links
@@ -1,4 +1,6 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
+
 from src.models import Alert
 
 
@@ -15,6 +17,14 @@ class BaseAlertStore(ABC):
     async def put(self, id, alert: Alert):
         pass
 
+    async def put_many(self, alerts: Iterable[Alert], journal: bool = True):
+        """
+        Puts alerts keyed by their id. `journal=False` skips persisting them,
+        for replayed history that is already on disk.
+        """
+        for alert in alerts:
+            await self.put(alert.id, alert)
+
     @abstractmethod
     async def has(self, id) -> bool:
         pass
@@ -23,6 +33,27 @@ class BaseAlertStore(ABC):
     async def get_count(self, id) -> int:
         pass
 
+    @abstractmethod
+    async def add_count(self, id, count: int):
+        """Adds occurrences of an alert seen before, e.g. restored from a snapshot."""
+        pass
+
+    @abstractmethod
+    async def get_history_count(self, id) -> int:
+        """
+        Part of the count that came from history (`put_many(..., journal=False)`
+        and `add_count`), what a snapshot keeps as live alerts are persisted
+        by the store itself.
+        """
+        pass
+
     @abstractmethod
     async def remove(self, id):
         pass
+
+    async def flush(self):
+        """Writes out anything buffered by the store."""
+        pass
+
+    async def close(self):
+        await self.flush()
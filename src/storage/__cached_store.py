@@ -0,0 +1,77 @@
+from src import metrics
+from src.config import cfg
+from . import BaseAlertStore
+from .__lru import LRUCache
+
+
+class CachedStore(BaseAlertStore):
+    """
+    Read-through cache in front of another store, keeping the last
+    `capacity` alerts read for at most `ttl` seconds (0 keeps them until
+    evicted). Writes go through to the store, updating or dropping the
+    cached entry.
+    """
+
+    def __init__(
+        self,
+        store: BaseAlertStore,
+        capacity: int = cfg.store_read_cache,
+        ttl: float = cfg.store_read_cache_ttl,
+    ) -> None:
+        self.store = store
+        self.cache = LRUCache(capacity, ttl)
+        self.hits = metrics.counter("store.cache_hits")
+        self.misses = metrics.counter("store.cache_misses")
+
+    def counted(self, id, n: int, alert=None):
+        """Keeps a cached entry in step with a write to the store."""
+        cached = self.cache.get(id)
+        if cached is not None:
+            self.cache[id] = [alert or cached[0], cached[1] + n]
+
+    async def get(self, id):
+        cached = self.cache.get(id)
+        if cached is not None:
+            self.hits.inc()
+            return cached
+        self.misses.inc()
+        entry = await self.store.get(id)
+        if entry[0] is not None:  # misses would only take the place of alerts.
+            self.cache[id] = entry
+        return entry
+
+    async def put(self, id, alert):
+        await self.store.put(id, alert)
+        self.counted(id, 1, alert)
+
+    async def put_many(self, alerts, journal=True):
+        alerts = list(alerts)
+        await self.store.put_many(alerts, journal)
+        for alert in alerts:
+            self.counted(alert.id, 1, alert)
+
+    async def has(self, id):
+        cached = self.cache.get(id)
+        if cached is not None and cached[0] is not None:
+            return True
+        return await self.store.has(id)
+
+    async def get_count(self, id):
+        return (await self.get(id))[1]
+
+    async def add_count(self, id, count):
+        await self.store.add_count(id, count)
+        self.counted(id, count)
+
+    async def get_history_count(self, id):
+        return await self.store.get_history_count(id)
+
+    async def remove(self, id):
+        await self.store.remove(id)
+        self.cache.pop(id)
+
+    async def flush(self):
+        await self.store.flush()
+
+    async def close(self):
+        await self.store.close()
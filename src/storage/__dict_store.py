@@ -1,24 +1,52 @@
-import json
+import logging
 from datetime import datetime
+from src.config import cfg
+from src.models import Alert
 from . import BaseAlertStore
+from .__journal import AlertJournal, replay_journal
+
+log = logging.getLogger(__name__)
 
 class DictStore(BaseAlertStore):
-    def __init__(self, file_path: str) -> None:
+    def __init__(self, journal_dir: str) -> None:
         self.store = {}
-        self.file_path = file_path
-        self.file = open(self.file_path, 'a')  # open once in append mode
+        self.history = {}  # part of the counts replayed from history
+        self.journal_dir = journal_dir
+        self.journal = AlertJournal(self.journal_dir)
 
     async def put(self, id, alert):
         self.store[id] = [alert, self.store.get(id, [None, 0])[1] + 1]
+        self.journal.append(self.record(id, alert))
+
+    async def put_many(self, alerts, journal=True):
+        for alert in alerts:
+            self.store[alert.id] = [alert, self.store.get(alert.id, [None, 0])[1] + 1]
+            if journal:
+                self.journal.append(self.record(alert.id, alert))
+            else:
+                self.history[alert.id] = self.history.get(alert.id, 0) + 1
+
+    def record(self, id, alert):
         # stream the alert to file
         date_str = datetime.utcnow().strftime('%Y-%m-%d')
-        record = {
+        return {
             "date": date_str,
             "id": id,
-            "alert": alert.to_dict() if hasattr(alert, 'to_dict') else str(alert)
+            "alert": alert.alert if hasattr(alert, 'alert') else str(alert)
         }
-        self.file.write(json.dumps(record) + '\n')
-        self.file.flush()
+
+    async def replay(self, workers=cfg.journal_replay_workers):
+        """Restores the alerts and counts journaled by previous runs."""
+        skipped = 0
+        for id, (record, count) in replay_journal(self.journal_dir, workers).items():
+            try:
+                alert = Alert(record)
+            except (KeyError, TypeError):
+                alert, skipped = None, skipped + 1
+            current = self.store.get(id, [None, 0])
+            self.store[id] = [alert or current[0], current[1] + count]
+        if skipped:
+            log.warning(f"Replayed {skipped} alerts without their details.")
 
     async def get(self, id):
         return self.store.get(id, [None, 0])
@@ -29,9 +57,25 @@ class DictStore(BaseAlertStore):
     async def get_count(self, id):
         return self.store.get(id, [None, 0])[1]
 
+    async def add_count(self, id, count):
+        alert, current = self.store.get(id, [None, 0])
+        self.store[id] = [alert, current + count]
+        self.history[id] = self.history.get(id, 0) + count
+
+    async def get_history_count(self, id):
+        return self.history.get(id, 0)
+
     async def remove(self, id):
         self.store[id][1] = 0
+        self.history.pop(id, None)
+        self.journal.append({
+            "date": datetime.utcnow().strftime('%Y-%m-%d'),
+            "id": id,
+            "removed": True
+        })
+
+    async def flush(self):
+        await self.journal.flush()
 
-    def __del__(self):
-        if not self.file.closed:
-            self.file.close()
+    async def close(self):
+        await self.journal.close()
@@ -1,2 +1,4 @@
 from .__base import BaseAlertStore
 from .__dict_store import DictStore
+from .__sqlite_store import SQLiteStore
+from .__cached_store import CachedStore
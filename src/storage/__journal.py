@@ -0,0 +1,209 @@
+import asyncio
+import gzip
+import json
+import logging
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from pathlib import Path
+
+from src.config import cfg
+
+log = logging.getLogger(__name__)
+
+
+class AlertJournal:
+    """
+    Write-behind journal of the alerts put in a store.
+
+    Records are buffered in memory and written by a background task once
+    `batch_size` of them are waiting or `interval` seconds have passed, the
+    write itself optionally done in a thread (`offload`) to keep the event
+    loop free. `flush` and `close` write whatever is still buffered.
+
+    The journal is a directory of segments, `<date>.<seq>.jsonl` with the
+    date of the records in it. A segment is closed when the date changes or
+    it grows past `segment_bytes`, and gzipped if `compress` is set.
+
+    A journal of the old single file layout found at `directory` is moved
+    aside to `<directory>.legacy` and not replayed: it also holds the history
+    put at every startup, which can't be told apart from live alerts.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        batch_size: int = cfg.journal_batch_size,
+        interval: float = cfg.journal_flush_interval,
+        offload: bool = cfg.journal_offload,
+        segment_bytes: int = cfg.journal_segment_bytes,
+        compress: bool = cfg.journal_compress,
+    ) -> None:
+        self.directory = Path(directory)
+        if self.directory.is_file():
+            self.move_legacy()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.offload = offload
+        self.segment_bytes = segment_bytes
+        self.compress = compress
+
+        self.file = None
+        self.segment_date = None
+        self.size = 0
+
+        self.buffer: list[dict] = []
+        self.lock = asyncio.Lock()
+        self.full = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+    def move_legacy(self):
+        legacy = self.directory.with_name(f"{self.directory.name}.legacy")
+        self.directory.rename(legacy)
+        log.warning(f"Moved the single file journal {self.directory} to {legacy}.")
+
+    def append(self, record: dict):
+        self.buffer.append(record)
+        if self.task is None:
+            try:
+                self.task = asyncio.get_running_loop().create_task(
+                    self.flush_periodically()
+                )
+            except RuntimeError:
+                pass  # no loop, left for flush / close.
+        if len(self.buffer) >= self.batch_size:
+            self.full.set()
+
+    async def flush_periodically(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.full.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.full.clear()
+            await self.flush()
+
+    def open_segment(self, date: str):
+        seqs = [
+            int(path.name.split(".")[1]) for path in self.directory.glob(f"{date}.*")
+        ]
+        path = self.directory / f"{date}.{max(seqs, default=-1) + 1:04d}.jsonl"
+        self.file = open(path, "a")
+        self.segment_date = date
+        self.size = 0
+
+    def close_segment(self):
+        if self.file is None:
+            return
+        self.file.close()
+        if self.compress:
+            path = Path(self.file.name)
+            with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            path.unlink()
+        self.file = None
+
+    def write(self, records: list[dict]):
+        for date, group in groupby(records, key=lambda record: record["date"]):
+            lines = []
+            for record in group:
+                if self.file is None or date != self.segment_date:
+                    self.close_segment()
+                    self.open_segment(date)
+                line = json.dumps(record) + "\n"
+                lines.append(line)
+                self.size += len(line)
+                if self.size >= self.segment_bytes:
+                    self.file.write("".join(lines))
+                    self.close_segment()
+                    lines = []
+            if lines:
+                self.file.write("".join(lines))
+                self.file.flush()
+
+    async def flush(self):
+        async with self.lock:
+            records, self.buffer = self.buffer, []
+            if not records:
+                return
+            if self.offload:
+                write = asyncio.ensure_future(asyncio.to_thread(self.write, records))
+                try:
+                    await asyncio.shield(write)
+                except asyncio.CancelledError:
+                    # the thread can't be stopped, hold the lock until it is
+                    # done so close() doesn't write the same file alongside it
+                    await write
+                    raise
+            else:
+                self.write(records)
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        await self.flush()
+        self.close_segment()
+
+    def __del__(self):
+        # no writing here, the interpreter may be half torn down. Records
+        # still buffered are lost unless the store was closed.
+        file = getattr(self, "file", None)
+        if file is not None:
+            file.close()
+
+
+def journal_segments(directory: str) -> list[Path]:
+    """Segments of a journal, oldest first."""
+    paths = [*Path(directory).glob("*.jsonl"), *Path(directory).glob("*.jsonl.gz")]
+    return sorted(paths, key=lambda path: path.name.split(".")[:2])
+
+
+def replay_segment(path: Path) -> dict[str, list]:
+    """
+    Folds a segment into `id -> [latest alert, count, reset]`, `reset` set
+    when the count was zeroed in it so older segments are not added.
+    """
+    entries = {}
+    with (gzip.open if path.suffix == ".gz" else open)(path, "rt") as f:
+        for line in f:
+            # a torn last line is what a crash mid-write leaves.
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            entry = entries.setdefault(record["id"], [None, 0, False])
+            if record.get("removed"):
+                entry[1:] = [0, True]
+            else:
+                entry[0] = record["alert"]
+                entry[1] += 1
+    return entries
+
+
+def replay_journal(directory: str, workers: int = 1) -> dict[str, list]:
+    """
+    Rebuilds `id -> [latest alert record, count]` from all the segments,
+    folded by `workers` processes and merged in segment order.
+    """
+    paths = journal_segments(directory)
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            parts = list(pool.map(replay_segment, paths))
+    else:
+        parts = map(replay_segment, paths)
+
+    merged = {}
+    for part in parts:
+        for id, (alert, count, reset) in part.items():
+            prev_alert, prev_count = merged.get(id, (None, 0))
+            merged[id] = [
+                alert if alert is not None else prev_alert,
+                count if reset else prev_count + count,
+            ]
+    return merged
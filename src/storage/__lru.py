@@ -0,0 +1,41 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Mapping bounded to `capacity` entries, evicting the least recently used.
+    With a `ttl` (seconds) entries also expire that long after being set.
+    """
+
+    def __init__(self, capacity: int, ttl: float = 0) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self.data = OrderedDict()  # key -> (value, expiry)
+
+    def get(self, key, default=None):
+        entry = self.data.get(key)
+        if entry is None:
+            return default
+        if self.ttl and entry[1] <= time.monotonic():
+            del self.data[key]
+            return default
+        self.data.move_to_end(key)
+        return entry[0]
+
+    def __setitem__(self, key, value):
+        expiry = time.monotonic() + self.ttl if self.ttl else 0
+        self.data[key] = (value, expiry)
+        self.data.move_to_end(key)
+        if len(self.data) > self.capacity:
+            self.data.popitem(last=False)
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, self) is not self
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def pop(self, key, default=None):
+        entry = self.data.pop(key, None)
+        return default if entry is None else entry[0]
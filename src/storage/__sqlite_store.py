@@ -0,0 +1,179 @@
+import asyncio
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from weakref import WeakValueDictionary
+
+from src.config import cfg
+from src.models import Alert
+from . import BaseAlertStore
+from .__lru import LRUCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    alert TEXT,
+    count INTEGER NOT NULL DEFAULT 0,
+    history INTEGER NOT NULL DEFAULT 0
+)
+"""
+PUT = """
+INSERT INTO alerts (id, alert, count) VALUES (?, ?, 1)
+ON CONFLICT (id) DO UPDATE SET alert = excluded.alert, count = count + 1
+RETURNING count + history
+"""
+PUT_HISTORY = """
+INSERT INTO alerts (id, alert, history) VALUES (?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET alert = excluded.alert, history = history + excluded.history
+"""
+ADD_HISTORY = """
+INSERT INTO alerts (id, history) VALUES (?, ?)
+ON CONFLICT (id) DO UPDATE SET history = history + excluded.history
+"""
+GET = "SELECT alert, count + history FROM alerts WHERE id = ?"
+GET_HISTORY = "SELECT history FROM alerts WHERE id = ?"
+REMOVE = "UPDATE alerts SET count = 0, history = 0 WHERE id = ?"
+
+
+class SQLiteStore(BaseAlertStore):
+    """
+    Alert store persisted in a SQLite database in WAL mode.
+
+    Database calls run on a thread of their own, off the event loop. Writes
+    go into an open transaction committed once `commit_batch` of them are
+    pending or `commit_interval` seconds after the first, and on `flush` /
+    `close`. Counts of live alerts survive restarts, history replayed
+    through `put_many(..., journal=False)` or restored with `add_count` is
+    kept apart and cleared on startup, as it is replayed again.
+
+    Recently used alerts are kept as live objects in an LRU cache. Alerts
+    evicted from it while still referenced, e.g. by the open batches of the
+    detector that hangs its groups off them, are found again through weak
+    references instead of being rebuilt from the database.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        cache_size: int = cfg.store_cache_size,
+        commit_batch: int = cfg.sqlite_commit_batch,
+        commit_interval: float = cfg.sqlite_commit_interval,
+    ) -> None:
+        self.db = sqlite3.connect(url, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.execute("PRAGMA synchronous = NORMAL")
+        self.db.execute(SCHEMA)
+        self.db.execute("UPDATE alerts SET history = 0")
+        self.db.commit()
+        # one thread, so calls on the connection never overlap.
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="sqlite-store")
+
+        self.cache = LRUCache(cache_size)
+        self.live: WeakValueDictionary[str, Alert] = WeakValueDictionary()
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.pending = 0
+        self.commit_timer: asyncio.TimerHandle | None = None
+        self.commit_task: asyncio.Task | None = None
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    async def fetchone(self, sql: str, params=()):
+        return await self.run(lambda: self.db.execute(sql, params).fetchone())
+
+    def remember(self, id, entry: list):
+        self.cache[id] = entry
+        if entry[0] is not None:
+            self.live[id] = entry[0]
+
+    async def written(self, count: int):
+        self.pending += count
+        if self.pending >= self.commit_batch:
+            await self.commit()
+        elif self.commit_timer is None:
+            self.commit_timer = asyncio.get_running_loop().call_later(
+                self.commit_interval, self.commit_later
+            )
+
+    def commit_later(self):
+        self.commit_task = asyncio.ensure_future(self.commit())
+
+    async def commit(self):
+        if self.commit_timer is not None:
+            self.commit_timer.cancel()
+            self.commit_timer = None
+        if self.pending:
+            self.pending = 0
+            await self.run(self.db.commit)
+
+    async def put(self, id, alert):
+        (count,) = await self.fetchone(PUT, (id, json.dumps(alert.alert)))
+        self.remember(id, [alert, count])
+        await self.written(1)
+
+    async def put_many(self, alerts, journal=True):
+        if journal:
+            for alert in alerts:
+                await self.put(alert.id, alert)
+            return
+
+        # folded per id first, history repeats the same few ids a lot.
+        latest = {}
+        for alert in alerts:
+            prev = latest.get(alert.id)
+            latest[alert.id] = [alert, prev[1] + 1 if prev else 1]
+            cached = self.cache.get(alert.id)
+            if cached is not None:
+                self.remember(alert.id, [alert, cached[1] + 1])
+        rows = [(id, json.dumps(a.alert), count) for id, (a, count) in latest.items()]
+        await self.run(self.db.executemany, PUT_HISTORY, rows)
+        await self.written(len(latest))
+
+    async def get(self, id):
+        cached = self.cache.get(id)
+        if cached is not None:
+            return cached
+        row = await self.fetchone(GET, (id,))
+        if row is None:
+            return [None, 0]
+        alert_json, count = row
+        alert = self.live.get(id)
+        if alert is None and alert_json:
+            alert = Alert(json.loads(alert_json))
+        entry = [alert, count]
+        self.remember(id, entry)
+        return entry
+
+    async def has(self, id):
+        return id in self.cache or await self.fetchone(GET, (id,)) is not None
+
+    async def get_count(self, id):
+        return (await self.get(id))[1]
+
+    async def add_count(self, id, count):
+        await self.run(self.db.execute, ADD_HISTORY, (id, count))
+        cached = self.cache.get(id)
+        if cached is not None:
+            self.cache[id] = [cached[0], cached[1] + count]
+        await self.written(1)
+
+    async def get_history_count(self, id):
+        row = await self.fetchone(GET_HISTORY, (id,))
+        return row[0] if row else 0
+
+    async def remove(self, id):
+        await self.run(self.db.execute, REMOVE, (id,))
+        cached = self.cache.get(id)
+        if cached is not None:
+            cached[1] = 0
+        await self.written(1)
+
+    async def flush(self):
+        await self.commit()
+
+    async def close(self):
+        await self.commit()
+        await self.run(self.db.close)
+        self.executor.shutdown()
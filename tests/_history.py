@@ -0,0 +1,51 @@
+import random
+from collections import defaultdict
+
+from src.config import cfg
+from src.models import ALERT_STATE, Alert
+from src.preprocessing.causal_inference import process_batch
+
+START_US = 1_800_000_000_000_000
+
+
+def synthetic_batches(graph, n_batches: int, seed: int) -> list[list[Alert]]:
+    """
+    Random batches of alerts of the services of `graph`, sorted by start
+    time. Gaps of zero give ties on the start time and gaps past
+    `cfg.time_delta` give invalid links, so both rules get exercised.
+    """
+    rng = random.Random(seed)
+    services = sorted(graph.graph)
+    start = START_US
+    batches = []
+    for _ in range(n_batches):
+        batch = []
+        for _ in range(rng.randint(1, 8)):
+            service = rng.choice(services)
+            start += rng.choice([0, 0, 30, 90, 150, 240]) * 1_000_000
+            batch.append(
+                Alert.from_record(
+                    graph.graph[service].service,
+                    service,
+                    str(rng.randint(1, 2)),
+                    "critical",
+                    start,
+                    start + 180_000_000,
+                    ALERT_STATE.FIRING,
+                    "synthetic",
+                    "synthetic",
+                )
+            )
+        batches.append(batch)
+        start += 3600 * 1_000_000
+    return batches
+
+
+def python_links(batches: list[list[Alert]], graph) -> dict:
+    """Links of the python engine: `process_batch` summed over the batches."""
+    total = defaultdict(lambda: [cfg.initial_alpha, cfg.initial_beta])
+    for batch in batches:
+        for key, (a, b) in process_batch(batch, graph).items():
+            total[key][0] += a - cfg.initial_alpha
+            total[key][1] += b - cfg.initial_beta
+    return dict(total)
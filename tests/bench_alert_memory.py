@@ -0,0 +1,101 @@
+import csv
+import gc
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+import _path
+
+from src.graph import ServiceGraph
+from src.models import Alert, GraphNode
+from src.models.alert import change_to_date, status
+
+_path.thing = None  # this is to make sure the import is not removed.
+
+csv_path = Path(__file__).parent.parent / "test_data/data/all_alerts.csv"
+map_path = Path(__file__).parent.parent / "test_data/test_service_map.yaml"
+
+
+class DictAlert:
+    """The alert representation used before the slotted Alert, kept as the baseline."""
+
+    def __init__(self, alert_json: dict) -> None:
+        self.alert = alert_json
+        self.service_name = alert_json["labels"]["job"]
+        self.service = GraphNode.get_id(self.service_name)
+        self.severity = alert_json["labels"]["severity"]
+        self.startsAt = change_to_date(alert_json["startsAt"])
+        self.endsAt = change_to_date(alert_json["endsAt"])
+        self.status = status[alert_json["status"]]
+        self.is_root_cause = False
+        self.parent_count = 0
+        self.parent_id = ""
+        self.description = alert_json["annotations"]["description"]
+        self.summary = alert_json["annotations"]["summary"]
+        self.id = f"{self.service}.{self.alert['labels']['instance']}"
+
+
+def to_alert_json(row: dict) -> dict:
+    return {
+        "labels": {
+            "job": row["job"],
+            "instance": row["instance"],
+            "severity": row["severity"],
+        },
+        "startsAt": row["startsAt"],
+        "endsAt": row["endsAt"],
+        "status": row["status"],
+        "annotations": {
+            "description": row["description"],
+            "summary": row["summary"],
+        },
+    }
+
+
+def synthetic_rows(n):
+    services = list(GraphNode.srevice_to_id)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+    for i in range(n):
+        service = services[i % len(services)]
+        t = datetime.fromtimestamp(start + 40 * i, timezone.utc)
+        yield {
+            "job": service,
+            "instance": str(i % 3),
+            "severity": "critical",
+            "startsAt": t.strftime("%Y-%m-%dT%H:%M:%S"),
+            "endsAt": t.strftime("%Y-%m-%dT%H:%M:%S"),
+            "status": "firing",
+            "description": f"{service} alert",
+            "summary": f"{service} experienced '{service} alert'",
+        }
+
+
+def read_rows():
+    if csv_path.exists():
+        with open(csv_path, newline="") as f:
+            yield from csv.DictReader(f)
+    else:
+        yield from synthetic_rows(200_000)
+
+
+def measure(cls):
+    """Peak and retained bytes of loading the history with `cls`."""
+    change_to_date.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    alerts = [cls(to_alert_json(row)) for row in read_rows()]
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(alerts), retained, peak
+
+
+if __name__ == "__main__":
+    ServiceGraph(str(map_path))
+    if not csv_path.exists():
+        print(f"{csv_path} not found, using synthetic alerts.")
+
+    for name, cls in [("dict Alert (old)", DictAlert), ("slotted Alert", Alert)]:
+        n, retained, peak = measure(cls)
+        print(
+            f"{name:<18} {n} alerts, retained {retained / 2**20:7.1f} MiB"
+            f" ({retained / n:5.0f} B/alert), peak {peak / 2**20:7.1f} MiB"
+        )
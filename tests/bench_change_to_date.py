@@ -0,0 +1,46 @@
+import timeit
+from datetime import datetime, timedelta, timezone
+import _path
+
+from src.models.alert import change_to_date
+
+_path.thing = None  # this is to make sure the import is not removed.
+
+
+def strptime_parse(t_str):
+    """The parser change_to_date used before, kept as the baseline."""
+    try:
+        return datetime.strptime(t_str, "%Y-%m-%dT%H:%M:%S.%f").replace(
+            tzinfo=timezone.utc
+        )
+    except ValueError:
+        return datetime.strptime(t_str, "%Y-%m-%dT%H:%M:%S").replace(
+            tzinfo=timezone.utc
+        )
+
+
+def timestamps(n, repeat):
+    """`n` distinct timestamps, each showing up `repeat` times close together."""
+    start = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    return [
+        (start + timedelta(seconds=37 * i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for i in range(n)
+        for _ in range(repeat)
+    ]
+
+
+def bench(name, parse, data, number=5):
+    t = min(timeit.repeat(lambda: [parse(s) for s in data], number=1, repeat=number))
+    print(f"{name:<32} {t * 1e9 / len(data):8.0f} ns/timestamp")
+
+
+if __name__ == "__main__":
+    data = timestamps(50_000, 4)
+
+    bench("strptime (old)", strptime_parse, [s[:-1] for s in data])
+    bench("change_to_date (cold memo)", change_to_date.__wrapped__, data)
+    change_to_date.cache_clear()
+    bench("change_to_date (memoized)", change_to_date, data)
+
+    for s in ["2025-03-01T12:30:01Z", "2025-03-01T12:30:01.123456789Z"]:
+        print(s, "->", change_to_date(s))
@@ -0,0 +1,69 @@
+import random
+import tempfile
+
+import _path
+
+from src.links import BinaryLinkStore, DictLinkStore
+
+_path.thing = None
+
+
+def random_links(n_ids: int, n_links: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    ids = [f"{rng.randint(1, 7)}.{i}" for i in range(n_ids)]
+    links = {}
+    while len(links) < n_links:
+        links[rng.choice(ids), rng.choice(ids)] = [
+            rng.randint(1, 50),
+            rng.randint(1, 50),
+        ]
+    return links
+
+
+def test_round_trip():
+    """A written table reads back as the dict store it was written from."""
+    links = DictLinkStore(random_links(2000, 20000, seed=0))
+    with tempfile.TemporaryDirectory() as tmp:
+        BinaryLinkStore.write(f"{tmp}/links.bin", links)
+        table = BinaryLinkStore(f"{tmp}/links.bin")
+
+        assert len(table) == len(links)
+        assert dict(table.items()) == dict(links.items())
+        for key, value in links.items():
+            assert table[key] == value and key in table
+        assert table.get(("missing", "1.0")) is None
+
+        ids = {id for key in links.keys() for id in key}
+        for id in ids:
+            # the detector walks these in order, so it has to be kept.
+            assert list(table.children_of(id)) == list(links.children_of(id)), id
+            assert list(table.parents_of(id)) == list(links.parents_of(id)), id
+            assert table.best_parent_alpha(id) == links.best_parent_alpha(id), id
+        table.close()
+
+
+def test_updates_on_top():
+    """Updates and new links are served from memory, the file is untouched."""
+    links = random_links(100, 500, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        BinaryLinkStore.write(f"{tmp}/links.bin", links)
+        table = BinaryLinkStore(f"{tmp}/links.bin")
+
+        key = next(iter(links))
+        table[key] = [99, 1]
+        table["new", "1.0"] = [1, 1]
+        assert table[key] == [99, 1]
+        assert ("new", "1.0") in table and len(table) == len(links) + 1
+        assert list(table.children_of("new")) == ["1.0"]
+        assert "new" in table.parents_of("1.0")
+        table.close()
+
+        reopened = BinaryLinkStore(f"{tmp}/links.bin")
+        assert reopened[key] == links[key] and ("new", "1.0") not in reopened
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_updates_on_top()
+    print("binary link table round-trips")
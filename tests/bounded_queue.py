@@ -0,0 +1,22 @@
+import _path
+
+from src.message_queue import BoundedQueue, OverflowPolicy
+
+_path.thing = None
+
+
+def test_dropped_payloads_skip_the_latency_gauge():
+    """Only payloads handed to a consumer count towards the queue latency."""
+    queue = BoundedQueue(2, OverflowPolicy.DROP_OLDEST)
+    queue.latency.value = -1.0
+    queue.put_nowait([{"n": 0}, {"n": 1}])
+    queue.put_nowait([{"n": 2}])
+    assert queue.dropped.value >= 2
+    assert queue.latency.value == -1.0, "a dropped payload set the latency"
+    assert queue.get_nowait() == [{"n": 2}]
+    assert queue.latency.value >= 0
+
+
+if __name__ == "__main__":
+    test_dropped_payloads_skip_the_latency_gauge()
+    print("dropped payloads leave the latency gauge alone")
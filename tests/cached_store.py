@@ -0,0 +1,70 @@
+import asyncio
+import tempfile
+
+import _path
+
+from src.graph import ServiceGraph
+from src.models import Alert
+from src.storage import CachedStore, DictStore
+
+_path.thing = None
+
+graph = ServiceGraph("test_data/test_service_map.yaml")  # names the services
+
+
+def alert(instance: str) -> Alert:
+    return Alert(
+        {
+            "labels": {
+                "job": "order-service",
+                "instance": instance,
+                "severity": "critical",
+            },
+            "startsAt": "2027-01-01T12:00:00",
+            "endsAt": "2027-01-01T12:03:00",
+            "status": "firing",
+            "annotations": {"description": "cached", "summary": "cached"},
+        }
+    )
+
+
+async def test_misses_are_not_cached():
+    """Unknown ids stay unknown and do not take the place of alerts."""
+    with tempfile.TemporaryDirectory() as tmp:
+        inner = DictStore(f"{tmp}/alerts")
+        store = CachedStore(inner, capacity=2, ttl=0)
+        a, b = alert("1"), alert("2")
+        await store.put(a.id, a)
+        await store.put(b.id, b)
+        assert (await store.get(a.id))[1] == 1 and (await store.get(b.id))[1] == 1
+
+        for id in ("x", "y", "z"):
+            assert await store.get(id) == [None, 0]
+            assert not await store.has(id)
+        assert len(store.cache) == 2 and a.id in store.cache and b.id in store.cache
+        await store.close()
+
+
+async def test_writes_go_through():
+    with tempfile.TemporaryDirectory() as tmp:
+        inner = DictStore(f"{tmp}/alerts")
+        store = CachedStore(inner, capacity=10, ttl=0)
+        a = alert("1")
+        await store.put(a.id, a)
+        await store.get(a.id)
+        await store.put(a.id, a)
+        await store.add_count(a.id, 3)
+        assert await store.get_count(a.id) == await inner.get_count(a.id) == 5
+        await store.remove(a.id)
+        assert await store.get_count(a.id) == 0
+        await store.close()
+
+
+async def test():
+    await test_misses_are_not_cached()
+    await test_writes_go_through()
+
+
+if __name__ == "__main__":
+    asyncio.run(test())
+    print("cached store keeps in step with its store")
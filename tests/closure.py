@@ -0,0 +1,83 @@
+import random
+import tempfile
+from collections import deque
+
+import _path
+import yaml
+
+from src.graph import CSRServiceGraph, ServiceGraph
+
+_path.thing = None
+
+map_path = "test_data/test_service_map.yaml"
+
+
+def bfs_hops(graph, id: int) -> dict[int, int]:
+    """Ancestors of `id` with their distance, walking the parents directly."""
+    hops, queue = {}, deque([(id, 0)])
+    while queue:
+        node, depth = queue.popleft()
+        for parent in graph.get_parent_ids(node):
+            if parent not in hops and parent != id:
+                hops[parent] = depth + 1
+                queue.append((parent, depth + 1))
+    return hops
+
+
+def check(graph, ids):
+    for b in ids:
+        hops = bfs_hops(graph, b)
+        ancestors = [a.id for a in graph.get_ancestors(b)]
+        assert set(ancestors) == set(hops), b
+        assert [hops[a] for a in ancestors] == sorted(hops.values()), b
+        for a in ids:
+            assert graph.distance(a, b) == hops.get(a), (a, b)
+            assert graph.is_ancestor(a, b) == (a in hops), (a, b)
+
+
+def random_map(path: str, n: int, seed: int):
+    rng = random.Random(seed)
+    nodes = [
+        {
+            "id": i,
+            "service": f"random-{i}",
+            "parents": rng.sample(range(i), min(i, rng.randint(0, 3))),
+            "children": [],
+        }
+        for i in range(n)
+    ]
+    with open(path, "w") as f:
+        yaml.safe_dump({"nodes": nodes}, f)
+
+
+def test_matches_bfs():
+    for cls in (ServiceGraph, CSRServiceGraph):
+        graph = cls(map_path)
+        check(graph, range(1, 8))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        random_map(f"{tmp}/map.yaml", 150, seed=1)
+        for cls in (ServiceGraph, CSRServiceGraph):
+            check(cls(f"{tmp}/map.yaml"), range(150))
+
+
+def test_incremental_updates():
+    """The closure kept up to date by add / remove matches a fresh BFS."""
+    with tempfile.TemporaryDirectory() as tmp:
+        random_map(f"{tmp}/map.yaml", 150, seed=2)
+        graph = ServiceGraph(f"{tmp}/map.yaml")
+        # only part of the closure is known when the graph changes.
+        check(graph, range(0, 150, 7))
+
+        graph.add(150, "random-150", {5, 17}, {40, 120})
+        check(graph, range(151))
+        graph.add(10, "random-10", {149}, set())
+        check(graph, range(151))
+        graph.remove(40)
+        check(graph, [id for id in range(151) if id != 40])
+
+
+if __name__ == "__main__":
+    test_matches_bfs()
+    test_incremental_updates()
+    print("closure matches a brute-force BFS")
@@ -0,0 +1,38 @@
+import _path
+
+import src.listners.__dedup as dedup
+from src.listners import DedupCache
+
+_path.thing = None
+
+now = [0.0]
+dedup.time.monotonic = lambda: now[0]
+
+raw = {
+    "labels": {"job": "order-service", "instance": "1"},
+    "startsAt": "2027-01-01T12:00:00",
+    "status": "firing",
+}
+
+
+def test_resends_refresh_the_expiry():
+    """An alert re-sent more often than the ttl is never let through again."""
+    cache = DedupCache(10)
+    cache.remember(cache.fresh([raw]))
+    for now[0] in (8, 16, 24, 32):
+        assert cache.fresh([raw]) == [], f"re-send at {now[0]}s went through"
+    now[0] = 50
+    assert cache.fresh([raw]) == [raw], "entry did not expire after the ttl"
+
+
+def test_status_change_goes_through():
+    cache = DedupCache(10)
+    cache.remember(cache.fresh([raw]))
+    resolved = {**raw, "status": "resolved"}
+    assert cache.fresh([raw, resolved]) == [resolved]
+
+
+if __name__ == "__main__":
+    test_resends_refresh_the_expiry()
+    test_status_change_goes_through()
+    print("dedup expiry refreshed by re-sends")
@@ -0,0 +1,91 @@
+import asyncio
+import json
+import shutil
+import tempfile
+
+import _path
+import yaml
+
+from src.config import cfg
+from src.detector import ProbabilityDetector
+from src.graph import ServiceGraph, edge_priors
+from src.message_queue import AsyncQueue
+from src.models import Alert, FeedBack
+from src.notifier import BaseNotifier
+from src.storage import DictStore
+
+_path.thing = None
+
+map_path = "test_data/test_service_map.yaml"
+
+
+class NullNotifier(BaseNotifier):
+    async def notify(self, alertg):
+        pass
+
+
+def alert(service: str, starts_at: str) -> Alert:
+    return Alert(
+        {
+            "labels": {"job": service, "instance": "1", "severity": "critical"},
+            "startsAt": starts_at,
+            "endsAt": starts_at,
+            "status": "firing",
+            "annotations": {"description": "prior", "summary": "prior"},
+        }
+    )
+
+
+def test_edge_priors():
+    """Call shares scaled by the edge attributes, bare edges have no prior."""
+    priors = edge_priors(
+        {3: {"calls": 30}, 1: {"calls": 10, "criticality": 0.5}, 2: {}}
+    )
+    assert priors == {3: 0.75, 1: 0.125}, priors
+    assert edge_priors({1: {"latency_coupling": 3}}) == {1: 1.0}
+
+
+async def test_prior_seeded_alpha():
+    """
+    Links start at the initial alpha plus the weighted prior of their graph
+    edge, whether the detector creates them or a feedback does.
+    """
+    cfg.delay = 0.05
+    cfg.edge_prior_weight = 4
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/map.yaml"
+        shutil.copy(map_path, path)
+        with open(path) as f:
+            config = yaml.safe_load(f)
+        order = next(n for n in config["nodes"] if n["service"] == "order-service")
+        order["edges"] = {1: {"calls": 1}, 3: {"calls": 3}}
+        with open(path, "w") as f:
+            yaml.safe_dump(config, f)
+
+        graph = ServiceGraph(path)
+        store = DictStore(f"{tmp}/alerts")
+        detector = ProbabilityDetector(graph, AsyncQueue(), store, NullNotifier(), {})
+        await detector.process_alerts(
+            [
+                alert("inventory-service", "2027-01-01T12:00:00"),
+                alert("order-service", "2027-01-01T12:00:10"),
+            ]
+        )
+        assert detector.links[("3.1", "4.1")] == [
+            cfg.initial_alpha + 3,
+            cfg.initial_beta,
+        ]
+
+        await detector.feedback_handler(FeedBack(json.dumps([["1.1", "4.1", True]])))
+        assert detector.links[("1.1", "4.1")] == [
+            cfg.initial_alpha + 1 + 1,
+            cfg.initial_beta,
+        ]
+        await asyncio.sleep(cfg.delay * 3)
+        await store.close()
+
+
+if __name__ == "__main__":
+    test_edge_priors()
+    asyncio.run(test_prior_seeded_alpha())
+    print("links are seeded with their edge priors")
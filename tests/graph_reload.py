@@ -0,0 +1,141 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+import _path
+import yaml
+
+from src.config import cfg
+from src.detector import ProbabilityDetector
+from src.graph import CSRServiceGraph, ServiceGraph
+from src.message_queue import AsyncQueue
+from src.models import Alert, GraphNode
+from src.notifier import BaseNotifier
+from src.storage import DictStore
+
+_path.thing = None
+
+map_path = "test_data/test_service_map.yaml"
+
+
+class NullNotifier(BaseNotifier):
+    async def notify(self, alertg):
+        pass
+
+
+def raw_alert(service: str, starts_at: str) -> dict:
+    return {
+        "labels": {"job": service, "instance": "1", "severity": "critical"},
+        "startsAt": starts_at,
+        "endsAt": starts_at,
+        "status": "firing",
+        "annotations": {"description": "reload", "summary": "reload"},
+    }
+
+
+def rewrite(path: str, config: dict):
+    with open(path, "w") as f:
+        yaml.safe_dump(config, f)
+    # mtimes of quick writes can collide, move it forward explicitly.
+    mtime = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime, mtime))
+
+
+async def test_update():
+    """A reload adds, renames and removes services of the live graph."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/map.yaml"
+        shutil.copy(map_path, path)
+        graph = ServiceGraph(path)
+        with open(path) as f:
+            config = yaml.safe_load(f)
+
+        config["nodes"].append(
+            {"id": 8, "service": "search-service", "parents": [4], "children": []}
+        )
+        rewrite(path, config)
+        assert await graph.update()
+        assert graph.get_parent_ids(8) == [4] and graph.is_ancestor(1, 8)
+        assert GraphNode.get_id("search-service") == 8
+
+        config["nodes"][-1]["service"] = "query-service"
+        rewrite(path, config)
+        assert await graph.update()
+        assert GraphNode.get_id("query-service") == 8
+        assert "search-service" not in GraphNode.srevice_to_id
+
+        config["nodes"] = [n for n in config["nodes"] if n["id"] != 6]
+        for node in config["nodes"]:
+            node["children"] = [c for c in node["children"] if c != 6]
+            node["parents"] = [p for p in node["parents"] if p != 6]
+        rewrite(path, config)
+        assert await graph.update()
+        assert not graph.has_node(6) and 6 not in graph.get_dependent_ids(4)
+        assert "shipping-service" not in GraphNode.srevice_to_id
+        assert not await graph.update()
+
+
+async def test_csr_update():
+    """The CSR graph forgets the names of renamed and removed services too."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/map.yaml"
+        shutil.copy(map_path, path)
+        graph = CSRServiceGraph(path)
+        with open(path) as f:
+            config = yaml.safe_load(f)
+
+        node = next(n for n in config["nodes"] if n["id"] == 5)
+        renamed, node["service"] = node["service"], "billing-service"
+        config["nodes"] = [n for n in config["nodes"] if n["id"] != 6]
+        for node in config["nodes"]:
+            node["children"] = [c for c in node["children"] if c != 6]
+            node["parents"] = [p for p in node["parents"] if p != 6]
+        rewrite(path, config)
+        assert await graph.update()
+        assert GraphNode.get_id("billing-service") == 5
+        assert renamed not in GraphNode.srevice_to_id
+        assert "shipping-service" not in GraphNode.srevice_to_id
+        assert not graph.has_node(6)
+
+
+async def test_alerts_of_removed_services():
+    """Alerts of a service removed while they were queued are skipped."""
+    cfg.delay = 0.05
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/map.yaml"
+        shutil.copy(map_path, path)
+        graph = ServiceGraph(path)
+        store = DictStore(f"{tmp}/alerts")
+        queue = AsyncQueue()
+        detector = ProbabilityDetector(graph, queue, store, NullNotifier(), {})
+        queued = Alert(raw_alert("shipping-service", "2027-01-01T12:00:00"))
+
+        with open(path) as f:
+            config = yaml.safe_load(f)
+        config["nodes"] = [n for n in config["nodes"] if n["id"] != 6]
+        rewrite(path, config)
+        assert await graph.update()
+
+        # decoded before the reload, then processed.
+        await detector.process_alerts([queued])
+        # still raw in the queue during the reload.
+        await queue.put(
+            [
+                raw_alert("shipping-service", "2027-01-01T12:00:10"),
+                raw_alert("order-service", "2027-01-01T12:00:20"),
+            ]
+        )
+        task = asyncio.create_task(detector.start())
+        await asyncio.sleep(0.1)
+        assert not task.done(), task.exception()
+        task.cancel()
+        assert await store.has("4.1") and not await store.has("6.1")
+        await store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(test_update())
+    asyncio.run(test_csr_update())
+    asyncio.run(test_alerts_of_removed_services())
+    print("graph reloads are applied and survived")
@@ -0,0 +1,52 @@
+import asyncio
+import tempfile
+
+import _path
+from probability import graph, pattren
+
+from src.config import cfg
+from src.detector import ProbabilityDetector
+from src.message_queue import AsyncQueue
+from src.models import AlertGroup
+from src.notifier import BaseNotifier
+from src.storage import DictStore
+
+_path.thing = None
+
+
+class RecordingNotifier(BaseNotifier):
+    def __init__(self) -> None:
+        self.notified = set()
+
+    async def notify(self, alertg: AlertGroup):
+        self.notified.update(a.id for a in (alertg.root, *alertg.group))
+
+
+async def test_every_alert_is_notified():
+    """
+    Replays the pattern of `probability.py` with an id per alert, so alerts
+    of one service link both ways. Every alert has to end up in a notified
+    group, none may be dropped by merging a group into itself.
+    """
+    cfg.delay = 0.05
+    alerts = [a for batch in pattren for a in batch]
+    for i, a in enumerate(alerts):
+        a.id = f"{a.id}#{i}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DictStore(f"{tmp}/alerts")
+        nf = RecordingNotifier()
+        gd = ProbabilityDetector(graph, AsyncQueue(), store, nf, {})
+        for a in alerts:
+            await store.put(a.id, a)
+            await gd.process_alert(a)
+        await asyncio.sleep(cfg.delay * 5)
+        await store.close()
+
+    missing = {a.id for a in alerts} - nf.notified
+    assert not missing, f"alerts missing from every group: {sorted(missing)}"
+    print(f"all {len(alerts)} alerts notified")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_every_alert_is_notified())
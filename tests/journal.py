@@ -0,0 +1,58 @@
+import asyncio
+import json
+import tempfile
+import threading
+import time
+
+import _path
+
+from src.storage.__journal import AlertJournal, journal_segments
+
+_path.thing = None
+
+
+def record(i: int) -> dict:
+    return {"date": "2027-01-01", "id": f"order-service.{i}", "n": i}
+
+
+async def test_close_waits_for_the_running_flush():
+    """
+    close() cancels the background task while its write is still running
+    in a thread. The final flush must only start once that write is done,
+    two writes at once would interleave in the same segment.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        journal = AlertJournal(
+            f"{tmp}/journal", batch_size=2, offload=True, compress=False
+        )
+        write, running, overlaps = journal.write, threading.Lock(), []
+
+        def slow_write(records):
+            if not running.acquire(blocking=False):
+                overlaps.append(records)
+                return write(records)
+            try:
+                time.sleep(0.2)
+                write(records)
+            finally:
+                running.release()
+
+        journal.write = slow_write
+        journal.append(record(0))
+        journal.append(record(1))
+        await asyncio.sleep(0.05)  # the background write is running
+        journal.append(record(2))
+        await journal.close()
+
+        assert not overlaps, "the final flush ran alongside the background one"
+        ids = [
+            json.loads(line)["n"]
+            for path in journal_segments(f"{tmp}/journal")
+            for line in path.read_text().splitlines()
+        ]
+        assert sorted(ids) == [0, 1, 2], ids
+
+
+if __name__ == "__main__":
+    asyncio.run(test_close_waits_for_the_running_flush())
+    print("journal close waits for the running flush")
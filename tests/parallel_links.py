@@ -0,0 +1,25 @@
+import _path
+from _history import python_links, synthetic_batches
+
+from src.graph import ServiceGraph
+from src.preprocessing.parallel import compute_links_parallel
+
+_path.thing = None
+
+graph = ServiceGraph("test_data/test_service_map.yaml")
+
+
+def test_same_links_for_any_worker_count():
+    """Sharded links equal the single process ones, in the same order."""
+    batches = synthetic_batches(graph, 200, seed=3)
+    expected = python_links(batches, graph)
+    for engine in ("python", "numpy"):
+        for workers in (1, 2, 3, 8):
+            links = dict(compute_links_parallel(batches, graph, workers, engine))
+            assert links == expected, f"{engine} with {workers} workers"
+            assert list(links) == list(expected), f"{engine} with {workers} workers"
+
+
+if __name__ == "__main__":
+    test_same_links_for_any_worker_count()
+    print("links are the same for any worker count")
@@ -0,0 +1,99 @@
+import asyncio
+import gc
+import sqlite3
+import tempfile
+
+import _path
+
+from src.graph import ServiceGraph
+from src.models import Alert
+from src.storage import SQLiteStore
+
+_path.thing = None
+
+graph = ServiceGraph("test_data/test_service_map.yaml")  # names the services
+
+
+def alert(service: str, instance: str) -> Alert:
+    return Alert(
+        {
+            "labels": {"job": service, "instance": instance, "severity": "critical"},
+            "startsAt": "2027-01-01T12:00:00",
+            "endsAt": "2027-01-01T12:03:00",
+            "status": "firing",
+            "annotations": {"description": "sqlite", "summary": "sqlite"},
+        }
+    )
+
+
+async def test_counts_survive_restarts():
+    """Live counts persist, history counts are cleared as they are replayed."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(f"{tmp}/alerts.db")
+        a = alert("order-service", "1")
+        await store.put(a.id, a)
+        await store.put(a.id, a)
+        await store.put_many([a, a, a], journal=False)
+        await store.add_count(a.id, 2)
+        assert await store.get_count(a.id) == 7
+        assert await store.get_history_count(a.id) == 5
+        await store.close()
+
+        store = SQLiteStore(f"{tmp}/alerts.db")
+        assert await store.get_count(a.id) == 2
+        assert await store.get_history_count(a.id) == 0
+        assert (await store.get(a.id))[0].id == a.id
+        await store.remove(a.id)
+        assert await store.get_count(a.id) == 0
+        assert not await store.has("missing")
+        await store.close()
+
+
+async def test_evicted_alerts_in_use_are_kept():
+    """An alert evicted from the cache but still referenced keeps its group."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(f"{tmp}/alerts.db", cache_size=2)
+        a = alert("order-service", "1")
+        a.group = "open batch"
+        await store.put(a.id, a)
+        for instance in "23":
+            other = alert("payment-service", instance)
+            await store.put(other.id, other)
+        assert a.id not in store.cache
+
+        stored, count = await store.get(a.id)
+        assert stored is a and stored.group == "open batch" and count == 1
+
+        del a, stored
+        store.cache.data.clear()
+        gc.collect()
+        stored, _ = await store.get("4.1")
+        assert stored.id == "4.1" and stored.group is None
+        await store.close()
+
+
+async def test_commit_timer():
+    """Pending writes are committed `commit_interval` after the first one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteStore(f"{tmp}/alerts.db", commit_batch=100, commit_interval=0.05)
+        a = alert("order-service", "1")
+        await store.put(a.id, a)
+
+        other = sqlite3.connect(f"{tmp}/alerts.db")
+        query = "SELECT count FROM alerts WHERE id = ?"
+        assert other.execute(query, (a.id,)).fetchone() is None
+        await asyncio.sleep(0.2)
+        assert other.execute(query, (a.id,)).fetchone() == (1,)
+        other.close()
+        await store.close()
+
+
+async def test():
+    await test_counts_survive_restarts()
+    await test_evicted_alerts_in_use_are_kept()
+    await test_commit_timer()
+
+
+if __name__ == "__main__":
+    asyncio.run(test())
+    print("sqlite store keeps its counts and alerts")
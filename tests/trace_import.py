@@ -0,0 +1,126 @@
+import json
+import tempfile
+from collections import Counter
+from pathlib import Path
+
+import _path
+import yaml
+
+from src.graph import ServiceGraph
+from src.graph.trace_import import count_calls, to_service_map
+
+_path.thing = None
+
+
+def otel_line(service: str, spans: list[tuple[str, str]]) -> str:
+    """One export request of `service`, spans as `(span id, parent span id)`."""
+    return json.dumps(
+        {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {"key": "service.name", "value": {"stringValue": service}}
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "spans": [
+                                {"traceId": "t1", "spanId": s, "parentSpanId": p}
+                                for s, p in spans
+                            ]
+                        }
+                    ],
+                }
+            ]
+        }
+    )
+
+
+def jaeger_dump() -> dict:
+    spans = [
+        {"spanID": "a", "processID": "p1", "references": []},
+        {
+            "spanID": "b",
+            "processID": "p2",
+            "references": [{"refType": "CHILD_OF", "spanID": "a"}],
+        },
+        {
+            "spanID": "c",
+            "processID": "p2",
+            "references": [{"refType": "FOLLOWS_FROM", "spanID": "a"}],
+        },
+    ]
+    processes = {"p1": {"serviceName": "web"}, "p2": {"serviceName": "orders"}}
+    return {"data": [{"spans": spans, "processes": processes}]}
+
+
+def test_otel_calls():
+    """Parents are resolved across lines, in either order."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "spans.jsonl")
+        lines = [
+            otel_line("orders", [("2", "1"), ("3", "2")]),  # before its parent
+            otel_line("web", [("1", "")]),
+            otel_line("db", [("4", "2"), ("5", "2")]),
+        ]
+        path.write_text("\n".join(lines) + "\n\n")
+        calls = count_calls([path])
+    assert calls == Counter({("web", "orders"): 1, ("orders", "db"): 2}), calls
+
+
+def test_jaeger_calls():
+    try:
+        import ijson  # noqa: F401
+    except ImportError:
+        print("ijson not installed, Jaeger import not tested")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, "traces.json")
+        path.write_text(json.dumps(jaeger_dump()))
+        assert count_calls([path]) == Counter({("web", "orders"): 1})
+
+
+def test_service_map_keeps_the_base():
+    """
+    Ids, edges and edge attributes of the base map survive, traced calls
+    only add their count, and the result loads as a service graph.
+    """
+    base = {
+        "nodes": [
+            {"id": 1, "service": "db", "children": [2], "parents": []},
+            {
+                "id": 2,
+                "service": "orders",
+                "children": [],
+                "parents": [1, 5],
+                "edges": {1: {"criticality": 0.5}},
+            },
+            {"id": 5, "service": "cache", "children": [2], "parents": []},
+        ]
+    }
+    calls = Counter({("web", "orders"): 4, ("orders", "db"): 3, ("web", "db"): 1})
+    service_map = to_service_map(calls, base, min_calls=2)
+    nodes = {n["service"]: n for n in service_map["nodes"]}
+
+    assert [nodes[s]["id"] for s in ("db", "orders", "cache", "web")] == [1, 2, 5, 6]
+    assert nodes["orders"]["parents"] == [1, 5]
+    assert nodes["orders"]["edges"] == {1: {"criticality": 0.5, "calls": 3}}
+    assert nodes["web"]["parents"] == [2] and nodes["web"]["edges"] == {2: {"calls": 4}}
+    assert nodes["cache"]["children"] == [2]
+    assert nodes["db"]["children"] == [2]  # web -> db is under min_calls
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/map.yaml"
+        with open(path, "w") as f:
+            yaml.safe_dump(service_map, f, sort_keys=False)
+        graph = ServiceGraph(path)
+    assert sorted(graph.get_parent_ids(2)) == [1, 5]
+    assert graph.is_ancestor(1, 6) and graph.get_edge_prior(1, 2) == 0.5
+
+
+if __name__ == "__main__":
+    test_otel_calls()
+    test_jaeger_calls()
+    test_service_map_keeps_the_base()
+    print("span dumps import into a service map")
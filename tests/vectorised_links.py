@@ -0,0 +1,29 @@
+import _path
+from _history import python_links, synthetic_batches
+
+from src.graph import ServiceGraph
+from src.preprocessing.vectorised import compute_links_vectorised
+
+_path.thing = None
+
+graph = ServiceGraph("test_data/test_service_map.yaml")
+
+
+def test_same_links_as_python():
+    """The numpy engine gives the python engine's links, in the same order."""
+    for seed in range(20):
+        batches = synthetic_batches(graph, 50, seed)
+        expected = python_links(batches, graph)
+        links = dict(compute_links_vectorised(batches, graph))
+        assert links == expected, f"links differ for seed {seed}"
+        assert list(links) == list(expected), f"order differs for seed {seed}"
+
+
+def test_empty():
+    assert not compute_links_vectorised([], graph)
+
+
+if __name__ == "__main__":
+    test_same_links_as_python()
+    test_empty()
+    print("numpy engine matches the python engine")